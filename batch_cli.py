@@ -0,0 +1,173 @@
+import argparse
+import csv
+import json
+import math
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from functools import lru_cache
+from poker_ev_app import evaluate_actions, parse_cards, worker_pool, worker_seed
+from range_library import default_range_library
+
+# Headless review of many spots: reads JSONL or CSV, one spot per line/row,
+# and writes one JSONL result per spot as soon as it finishes. Spot fields:
+#   hero_hand, board, pot, opp_bet, hero_stack, opp_stack
+#   range_path, or actions + position for a range from 6max_range.zip
+#   id (optional, copied to the output)
+# Spots missing a range use --range / --actions / --position.
+
+SPOT_NUMBERS = ("pot", "opp_bet", "hero_stack", "opp_stack")
+CARD_RANKS = "23456789TJQKA"
+CARD_SUITS = "shdc"
+PENDING_PER_WORKER = 4
+
+def read_spots(stream, fmt):
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield row
+        return
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def spot_cards(value):
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return parse_cards(value or "")
+
+def check_cards(hero_hand, board):
+    # A malformed spot gets a readable error on its own line instead of a
+    # KeyError from treys, or a silently wrong answer for duplicated cards.
+    for field, cards in (("hero_hand", hero_hand), ("board", board)):
+        for card in cards:
+            if len(card) != 2 or card[0] not in CARD_RANKS or card[1] not in CARD_SUITS:
+                raise ValueError(f"{field} has an invalid card {card!r} (expected e.g. Ah, Td, 9c)")
+    if len(hero_hand) != 2:
+        raise ValueError(f"hero_hand must be exactly 2 cards, got {len(hero_hand)}")
+    if len(board) not in (0, 3, 4, 5):
+        raise ValueError(f"board must be 0, 3, 4 or 5 cards, got {len(board)}")
+    cards = hero_hand + board
+    repeated = sorted(set(card for card in cards if cards.count(card) > 1))
+    if repeated:
+        raise ValueError(f"hero_hand + board repeat {', '.join(repeated)}")
+
+@lru_cache(maxsize=64)
+def load_range_file(path):
+    with open(path, "r") as f:
+        return f.read().strip()
+
+def spot_range(spot, defaults):
+    range_path = spot.get("range_path") or defaults["range_path"]
+    actions = spot.get("actions") or defaults["actions"]
+    position = spot.get("position") or defaults["position"]
+    if range_path:
+        return load_range_file(range_path)
+    if actions and position:
+        return default_range_library().range_str(actions, position)
+    raise ValueError("Spot has no range_path and no actions/position")
+
+# Runs in a worker process. Returns (output record, seconds spent solving).
+def evaluate_spot(line_number, spot, defaults, options):
+    start = time.perf_counter()
+    record = {"line": line_number}
+    if spot.get("id") not in (None, ""):
+        record["id"] = spot["id"]
+    try:
+        numbers = [float(spot[name]) for name in SPOT_NUMBERS]
+        hero_hand = spot_cards(spot["hero_hand"])
+        board = spot_cards(spot.get("board"))
+        check_cards(hero_hand, board)
+        record["results"] = evaluate_actions(hero_hand, spot_range(spot, defaults), board, *numbers, **options)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record, time.perf_counter() - start
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(math.ceil(fraction * len(sorted_values))) - 1)]
+
+def format_summary(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    spots = len(latencies)
+    ms = [1000 * value for value in latencies]
+    return (f"{spots} spots ({errors} errors) in {elapsed:.2f}s, {spots / elapsed if elapsed else 0:.1f} spots/s; "
+            f"latency ms p50 {percentile(ms, 0.5):.1f}, p95 {percentile(ms, 0.95):.1f}, "
+            f"p99 {percentile(ms, 0.99):.1f}, max {ms[-1] if ms else 0:.1f}")
+
+# Spots are solved one per worker (each spot single-process) with at most
+# PENDING_PER_WORKER spots in flight per worker, so memory stays flat however
+# long the input is. Results are written in completion order; "line" ties
+# each one back to its input.
+def run_batch(spots, out, workers=1, defaults=None, seed=None, **options):
+    defaults = defaults or {"range_path": None, "actions": None, "position": None}
+    # Every spot gets its own stream; without --seed one is drawn at random
+    # and reported so the run can be repeated.
+    seed = random.getrandbits(64) if seed is None else seed
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+
+    def write(record, latency):
+        nonlocal errors
+        record["latency_ms"] = round(1000 * latency, 3)
+        errors += "error" in record
+        latencies.append(latency)
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+
+    if workers <= 1:
+        for line_number, spot in enumerate(spots, 1):
+            write(*evaluate_spot(line_number, spot, defaults, dict(options, seed=worker_seed(seed, line_number))))
+    else:
+        pool = worker_pool(workers)
+        pending = deque()
+        for line_number, spot in enumerate(spots, 1):
+            pending.append(pool.submit(evaluate_spot, line_number, spot, defaults,
+                                       dict(options, seed=worker_seed(seed, line_number))))
+            if len(pending) >= PENDING_PER_WORKER * workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    write(*future.result())
+        for future in pending:
+            write(*future.result())
+    return {"spots": len(latencies), "errors": errors, "seed": seed,
+            "elapsed": time.perf_counter() - start, "latencies": latencies}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate poker spots from JSONL or CSV without the GUI.")
+    parser.add_argument("input", help="spots file (.jsonl or .csv), or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file (default: stdout)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="input format (default: from the file name)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (default: 1)")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--engine", choices=("treys", "numpy"), default="treys")
+    parser.add_argument("--sampler", choices=("plain", "stratified"), default="plain")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--range", dest="range_path", help="default opponent range file")
+    parser.add_argument("--actions", help="default action path in 6max_range.zip, e.g. BTN/2.5bb/BB/Call")
+    parser.add_argument("--position", help="default opponent position for --actions")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    defaults = {"range_path": args.range_path, "actions": args.actions, "position": args.position}
+    infile = sys.stdin if args.input == "-" else open(args.input, "r", newline="")
+    outfile = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        summary = run_batch(read_spots(infile, fmt), outfile, args.workers, defaults, args.seed,
+                            iterations=args.iterations, engine=args.engine, sampler=args.sampler)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    print(format_summary(summary["latencies"], summary["errors"], summary["elapsed"]) + f"; seed {summary['seed']}",
+          file=sys.stderr)
+    return 1 if summary["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+import itertools
+import math
+from functools import lru_cache
+import numpy as np
+from treys import Card
+from treys.lookup import LookupTable
+from poker_ev_app import STANDARD_DECK, compile_opponent_range, cards_mask, shared_evaluator
+
+# Batched equity engine. Cards are indexed by their position in STANDARD_DECK
+# (rank * 4 + suit) and 7-card hands are ranked with two precomputed tables:
+# one keyed by the prime product of the seven ranks (best non-flush hand) and
+# one keyed by the rank bits of a suit holding five or more cards (best flush).
+# Ranks are identical to treys' Evaluator, so wins and ties match exactly.
+
+CARD_INDEX = {card: i for i, card in enumerate(STANDARD_DECK)}
+CARD_PRIMES = np.array([Card.get_prime(card) for card in STANDARD_DECK], dtype=np.int64)
+# Row i holds card i's rank bit in its suit's column, so summing rows over a
+# hand gives the rank bits held in each suit.
+CARD_SUIT_BITS = np.zeros((52, 4), dtype=np.int64)
+CARD_SUIT_BITS[np.arange(52), np.arange(52) % 4] = [Card.get_bitrank_int(card) for card in STANDARD_DECK]
+NO_HAND = LookupTable.MAX_HIGH_CARD + 1
+CHUNK_SIZE = 50000
+
+# Whole-range tables: the 1326 two-card combos as pairs of deck indices
+# (low, high) in lexicographic order.
+COMBO_CARDS = np.array(list(itertools.combinations(range(52), 2)), dtype=np.int64)
+COMBO_IDS = {tuple(cards): i for i, cards in enumerate(COMBO_CARDS.tolist())}
+CARD_IN_COMBO = np.zeros((52, len(COMBO_CARDS)), dtype=bool)
+CARD_IN_COMBO[COMBO_CARDS[:, 0], np.arange(len(COMBO_CARDS))] = True
+CARD_IN_COMBO[COMBO_CARDS[:, 1], np.arange(len(COMBO_CARDS))] = True
+# The 51 combos holding each card.
+CARD_COMBOS = np.array([np.flatnonzero(CARD_IN_COMBO[card]) for card in range(52)], dtype=np.int64)
+RANK_SPAN = 8192
+RUNOUT_CHUNK = 128
+
+@lru_cache(maxsize=None)
+def rank_tables():
+    table = shared_evaluator().table
+    primes = np.array(Card.PRIMES, dtype=np.int64)
+    # Non-flush: every multiset of seven ranks with at most four of each.
+    five_keys = np.array(sorted(table.unsuited_lookup), dtype=np.int64)
+    five_values = np.array([table.unsuited_lookup[key] for key in five_keys], dtype=np.int32)
+    multisets = np.array([ranks for ranks in itertools.combinations_with_replacement(range(13), 7)
+                          if max(ranks.count(rank) for rank in set(ranks)) <= 4], dtype=np.int64)
+    best = np.full(len(multisets), NO_HAND, dtype=np.int32)
+    for subset in itertools.combinations(range(7), 5):
+        products = primes[multisets[:, subset]].prod(axis=1)
+        best = np.minimum(best, five_values[np.searchsorted(five_keys, products)])
+    seven_keys = primes[multisets].prod(axis=1)
+    order = np.argsort(seven_keys)
+    # Flush: best five-card flush for every set of five to seven suited ranks.
+    flush_values = np.full(1 << 13, NO_HAND, dtype=np.int32)
+    for count in (5, 6, 7):
+        for ranks in itertools.combinations(range(13), count):
+            bits = sum(1 << rank for rank in ranks)
+            flush_values[bits] = min(table.flush_lookup[Card.prime_product_from_rankbits(sum(1 << r for r in five))]
+                                     for five in itertools.combinations(ranks, 5))
+    return seven_keys[order], best[order], flush_values
+
+def board_parts(boards):
+    return CARD_PRIMES[boards].prod(axis=-1), CARD_SUIT_BITS[boards].sum(axis=-2)
+
+def evaluate_hands(hole_cards, board_products, board_suit_bits):
+    # Ranks hole cards against boards already reduced by board_parts, so the
+    # board work is shared between hero and opponent.
+    seven_keys, seven_values, flush_values = rank_tables()
+    products = board_products * CARD_PRIMES[hole_cards].prod(axis=-1)
+    suit_bits = board_suit_bits + CARD_SUIT_BITS[hole_cards].sum(axis=-2)
+    ranks = seven_values[np.searchsorted(seven_keys, products)]
+    return np.minimum(ranks, flush_values[suit_bits].min(axis=-1))
+
+def evaluate_seven(cards):
+    # cards: (N, 7) array of deck indices. Returns treys ranks (lower is better).
+    return evaluate_hands(cards[:, :2], *board_parts(cards[:, 2:]))
+
+def sample_runouts(rng, deck, opp_cards, num_to_deal):
+    # Random sort keys per row with the opponent's cards pushed to the end;
+    # the num_to_deal smallest keys are a uniform draw from the live deck.
+    n = len(opp_cards)
+    if num_to_deal == 0:
+        return np.empty((n, 0), dtype=np.int64)
+    deck_position = np.zeros(52, dtype=np.int64)
+    deck_position[deck] = np.arange(len(deck))
+    keys = rng.random((n, len(deck)))
+    np.put_along_axis(keys, deck_position[opp_cards], 2.0, axis=1)
+    return deck[np.argpartition(keys, num_to_deal - 1, axis=1)[:, :num_to_deal]]
+
+def stratified_runouts(rng, deck, opp_cards, num_to_deal):
+    # As poker_ev_app.stratified_runout: card j of row i comes from row i's
+    # slice of what is left of the live deck, the slices shuffled across rows
+    # independently for every j.
+    n = len(opp_cards)
+    deck_position = np.zeros(52, dtype=np.int64)
+    deck_position[deck] = np.arange(len(deck))
+    taken = np.sort(deck_position[opp_cards], axis=1)
+    for j in range(num_to_deal):
+        live = len(deck) - taken.shape[1]
+        slots = np.minimum(((rng.permutation(n) + rng.random()) * live / n).astype(np.int64), live - 1)
+        # Slot k of what is left skips every position already taken.
+        for column in range(taken.shape[1]):
+            slots += slots >= taken[:, column]
+        taken = np.sort(np.concatenate((taken, slots[:, None]), axis=1), axis=1)
+        runout = slots[:, None] if j == 0 else np.concatenate((runout, slots[:, None]), axis=1)
+    return deck[runout]
+
+def range_vector(opponent_range_str):
+    weights = np.zeros(len(COMBO_CARDS))
+    compiled = compile_opponent_range(opponent_range_str)
+    for (c1, c2), weight in zip(compiled.combos, compiled.weights):
+        weights[COMBO_IDS[tuple(sorted((CARD_INDEX[c1], CARD_INDEX[c2])))]] = weight
+    return weights
+
+def grouped_sums(group_keys, ranks, weights, query_groups, query_ranks):
+    # Sorts (group, rank) keys once, then reads per query the weight in its
+    # group ranked worse than, equal to, and in total against query_rank.
+    # weights may carry trailing columns beyond the shape of ranks (several
+    # sub-ranges at once); the sums keep them.
+    extra = weights.shape[ranks.ndim:]
+    order = np.argsort((group_keys * RANK_SPAN + ranks).ravel(), kind="stable")
+    sorted_keys = (group_keys * RANK_SPAN + ranks).ravel()[order]
+    flat = weights.reshape((-1,) + extra)[order]
+    cumulative = np.concatenate((np.zeros((1,) + extra), np.cumsum(flat, axis=0)))
+    group_size = ranks.shape[-1]
+    query = query_groups * RANK_SPAN + query_ranks
+    start = cumulative[query_groups * group_size]
+    end = cumulative[(query_groups + 1) * group_size]
+    better_or_equal = cumulative[np.searchsorted(sorted_keys, query, side="right")]
+    better = cumulative[np.searchsorted(sorted_keys, query, side="left")]
+    return end - better_or_equal, better_or_equal - better, end - start
+
+def rank_combos(board_products, board_suit_bits):
+    # evaluate_hands for all 1326 combos at once. Combos that collide with
+    # the board make impossible keys, so indices are clamped; their ranks are
+    # meaningless and they carry no weight.
+    seven_keys, seven_values, flush_values = rank_tables()
+    products = board_products[:, None] * np.prod(CARD_PRIMES[COMBO_CARDS], axis=-1)[None]
+    suit_bits = board_suit_bits[:, None, :] + CARD_SUIT_BITS[COMBO_CARDS].sum(axis=-2)[None]
+    ranks = seven_values[np.minimum(np.searchsorted(seven_keys, products), len(seven_keys) - 1)]
+    return np.minimum(ranks, flush_values[np.minimum(suit_bits, len(flush_values) - 1)].min(axis=-1))
+
+def board_runouts(board, limit=None, rng=None):
+    # Every completion of the board, or limit independent random ones when
+    # there are more than that.
+    live_cards = np.array([card for card in range(52) if card not in set(board)], dtype=np.int64)
+    missing = 5 - len(board)
+    count = math.comb(len(live_cards), missing)
+    if limit is None or count <= limit:
+        return np.array(list(itertools.combinations(live_cards, missing)), dtype=np.int64).reshape(count, missing)
+    rng = np.random.default_rng() if rng is None else rng
+    keys = rng.random((limit, len(live_cards)))
+    return live_cards[np.argpartition(keys, missing - 1, axis=1)[:, :missing]]
+
+def range_equity_sums(board, weights, runouts):
+    # Every hero combo against the weighted range over the given runouts at
+    # once: per combo, the opponent weight beaten (ties count half) and the
+    # opponent weight faced, summed over runouts, with card removal. weights
+    # is (1326,) or (1326, k) for k sub-ranges. Per runout the weight beaten
+    # or tied is read from sorted ranks, minus the combos sharing one of
+    # hero's two cards (inclusion-exclusion).
+    board = np.asarray(board, dtype=np.int64)
+    extra = weights.shape[1:]
+    expand = (slice(None), slice(None)) + (None,) * len(extra)
+    board_products, board_suit_bits = board_parts(board)
+    board_blocked = CARD_IN_COMBO[board].any(axis=0)
+    won = np.zeros(weights.shape)
+    total = np.zeros(weights.shape)
+    for start in range(0, len(runouts), RUNOUT_CHUNK):
+        chunk = runouts[start:start + RUNOUT_CHUNK]
+        n = len(chunk)
+        runout_products, runout_suit_bits = board_parts(chunk)
+        ranks = rank_combos(runout_products * board_products, runout_suit_bits + board_suit_bits)
+        live = ~(board_blocked | CARD_IN_COMBO[chunk].any(axis=1))
+        live_weights = weights[None] * live[expand]
+        rows = np.arange(n)[:, None]
+        worse, tied, combo_total = grouped_sums(rows, ranks, live_weights, rows, ranks)
+        card_groups = rows[:, :, None] * 52 + np.arange(52)[None, :, None]
+        card_ranks = ranks[:, CARD_COMBOS]
+        card_weights = live_weights[:, CARD_COMBOS]
+        for hero_card in (COMBO_CARDS[:, 0], COMBO_CARDS[:, 1]):
+            card_worse, card_tied, card_total = grouped_sums(card_groups, card_ranks, card_weights,
+                                                             rows * 52 + hero_card[None], ranks)
+            worse = worse - card_worse
+            tied = tied - card_tied
+            combo_total = combo_total - card_total
+        # Hero's own combo holds both cards, so it was removed twice.
+        tied = tied + live_weights
+        combo_total = combo_total + live_weights
+        won += np.where(live[expand], worse + 0.5 * tied, 0.0).sum(axis=0)
+        total += np.where(live[expand], combo_total, 0.0).sum(axis=0)
+    return won, total
+
+# {combo: [wins, ties, count]} per opponent combo, like
+# poker_ev_app.simulate_combo_outcomes (including its samplers).
+def batch_combo_outcomes(hero_hand, opponent_range_str, known_board, iterations, rng=None, sampler="plain"):
+    if sampler not in ("plain", "stratified"):
+        raise ValueError(f"Unknown sampler: {sampler}")
+    rng = np.random.default_rng() if rng is None else rng
+    hero_cards = [Card.new(card) for card in hero_hand]
+    board_cards = [Card.new(card) for card in known_board]
+    num_to_deal = 5 - len(board_cards)
+    combos, cum_weights = compile_opponent_range(opponent_range_str).unblocked(cards_mask(hero_cards + board_cards))
+    if not combos:
+        return {}
+    combo_cards = np.array([[CARD_INDEX[c1], CARD_INDEX[c2]] for c1, c2 in combos], dtype=np.int64)
+    cum_weights = np.array(cum_weights)
+    dead = set(CARD_INDEX[card] for card in hero_cards + board_cards)
+    deck = np.array([i for i in range(52) if i not in dead], dtype=np.int64)
+    hero = np.array([CARD_INDEX[card] for card in hero_cards], dtype=np.int64)
+    board_products, board_suit_bits = board_parts(np.array([CARD_INDEX[card] for card in board_cards], dtype=np.int64))
+    wins = np.zeros(len(combos), dtype=np.int64)
+    ties = np.zeros(len(combos), dtype=np.int64)
+    counts = np.zeros(len(combos), dtype=np.int64)
+    for start in range(0, iterations, CHUNK_SIZE):
+        n = min(CHUNK_SIZE, iterations - start)
+        if sampler == "stratified":
+            # Systematic: evenly spaced points with one random offset.
+            points = (np.arange(n) + rng.random()) / n
+            draws = np.searchsorted(cum_weights, points * cum_weights[-1], side="right")
+        else:
+            draws = np.searchsorted(cum_weights, rng.random(n) * cum_weights[-1], side="right")
+        draws = np.minimum(draws, len(combos) - 1)
+        opp_cards = combo_cards[draws]
+        if sampler == "stratified" and num_to_deal > 0:
+            runouts = stratified_runouts(rng, deck, opp_cards, num_to_deal)
+        else:
+            runouts = sample_runouts(rng, deck, opp_cards, num_to_deal)
+        runout_products, runout_suit_bits = board_parts(runouts)
+        products = runout_products * board_products
+        suit_bits = runout_suit_bits + board_suit_bits
+        hero_ranks = evaluate_hands(hero, products, suit_bits)
+        opp_ranks = evaluate_hands(opp_cards, products, suit_bits)
+        wins += np.bincount(draws[hero_ranks < opp_ranks], minlength=len(combos))
+        ties += np.bincount(draws[hero_ranks == opp_ranks], minlength=len(combos))
+        counts += np.bincount(draws, minlength=len(combos))
+    return {combos[i]: [int(wins[i]), int(ties[i]), int(counts[i])] for i in np.flatnonzero(counts)}
+
+def batch_win_tie_counts(hero_hand, opponent_range_str, known_board, iterations, rng=None):
+    outcomes = batch_combo_outcomes(hero_hand, opponent_range_str, known_board, iterations, rng)
+    return tuple(sum(outcome[i] for outcome in outcomes.values()) for i in range(3))
+
+def batch_win_rate_range(hero_hand, opponent_range_str, known_board, iterations=1000, rng=None):
+    wins, ties, count = batch_win_tie_counts(hero_hand, opponent_range_str, known_board, iterations, rng)
+    if count == 0:
+        return 0
+    return (wins + 0.5 * ties) / count
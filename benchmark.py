@@ -0,0 +1,138 @@
+import argparse
+import json
+import random
+import sys
+import time
+from treys import Card, Evaluator
+from poker_ev_app import (best_response_win_rate_range, evaluate_actions, get_random_hand_combo,
+                          opponent_fold_decision, parse_opponent_range)
+from range_library import default_range_library
+
+# Fixed spots and seeds so numbers are comparable between runs and engines.
+# Each spot: (name, hero, board, pot, opp_bet, stacks, actions, position).
+BENCHMARK_SPOTS = [
+    ("preflop", "AhKd", "", 5.5, 0, 97.5, "BTN/2.5bb/BB/Call", "BB"),
+    ("flop", "AhKh", "Qh7h2c", 5.5, 3, 97.5, "BTN/2.5bb/BB/Call", "BB"),
+    ("turn", "9c9d", "Qh7h2c3d", 12, 8, 90, "SB/3.0bb/BB/Call", "BB"),
+    ("river", "9c9d", "Qh7h2c3dAs", 28, 20, 80, "SB/3.0bb/BB/Call", "BB"),
+]
+SEED = 20240601
+
+def cards(card_str):
+    return [card_str[i:i+2] for i in range(0, len(card_str), 2)]
+
+def time_per_call(function, calls, rounds=3):
+    # Best of a few rounds; the minimum is the least noisy estimate.
+    best = None
+    for _ in range(rounds):
+        random.seed(SEED)
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = (time.perf_counter() - start) / calls
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def micro_benchmarks(range_str, scale):
+    hero = ["Ah", "Kh"]
+    board = ["Qh", "7h", "2c"]
+    removed = set(Card.new(card) for card in hero + board)
+    designations = [designation for designation, _ in parse_opponent_range(range_str)]
+    results = {
+        "evaluator_construction": time_per_call(Evaluator, max(1, 2 * scale)),
+        "get_random_hand_combo": time_per_call(
+            lambda: get_random_hand_combo(random.choice(designations), removed), 2000 * scale),
+        "opponent_fold_decision": time_per_call(
+            lambda: opponent_fold_decision(["Jd", "Tc"], board, 5, 10), 2000 * scale),
+    }
+    for name, hero_str, board_str, *_ in BENCHMARK_SPOTS:
+        results[f"best_response_win_rate_range_{name}"] = time_per_call(
+            lambda: best_response_win_rate_range(cards(hero_str), range_str, cards(board_str), 1000), max(1, scale))
+    return {name: {"seconds_per_call": seconds} for name, seconds in results.items()}
+
+def spot_benchmarks(iterations, engine, workers, sampler="plain"):
+    library = default_range_library()
+    # Warm up on a spot outside the set so one-off table builds (the numpy
+    # engine's rank tables, worker start-up) are not charged to the first spot.
+    evaluate_actions(cards("2c2d"), library.range_str("BTN/2.5bb/BB/Call", "BB"), cards("Ts9s8s"), 10, 0, 100, 100,
+                     100, engine=engine, workers=workers, seed=SEED, sampler=sampler)
+    results = {}
+    for name, hero, board, pot, opp_bet, stack, actions, position in BENCHMARK_SPOTS:
+        range_str = library.range_str(actions, position)
+        spot = evaluate_actions(cards(hero), range_str, cards(board), pot, opp_bet, stack, stack, iterations,
+                                engine=engine, workers=workers, seed=SEED, profile=True, sampler=sampler)
+        profile = spot["profile"]
+        stages = profile["stages"]
+        counters = profile["counters"]
+        equity_time = stages.get("win_sampling", 0) + stages.get("exact_enumeration", 0)
+        results[name] = {
+            "seconds": stages["total"],
+            "samples_per_second": counters.get("combos_sampled", 0) / stages["total"],
+            "evaluations_per_second": counters.get("hand_evaluations", 0) / equity_time if equity_time else 0.0,
+            "effective_sample_size": spot["effective_sample_size"],
+            "stages": stages,
+            "counters": counters,
+        }
+    return results
+
+def run_benchmarks(iterations=10000, engine="treys", workers=None, scale=1, sampler="plain"):
+    library = default_range_library()
+    return {
+        "config": {"iterations": iterations, "engine": engine, "workers": workers, "seed": SEED, "sampler": sampler},
+        "micro": micro_benchmarks(library.range_str("BTN/2.5bb/BB/Call", "BB"), scale),
+        "spots": spot_benchmarks(iterations, engine, workers, sampler),
+    }
+
+def format_report(report):
+    lines = [f"config: {report['config']}", "", "micro (per call):"]
+    for name, data in report["micro"].items():
+        lines.append(f"  {name:<40} {1e6 * data['seconds_per_call']:>12.1f} us")
+    lines += ["", f"  {'spot':<8} {'total ms':>9} {'samples/s':>11} {'evals/s':>11} {'eff. n':>8}  stages (ms)"]
+    for name, data in report["spots"].items():
+        stages = ", ".join(f"{stage} {1000 * seconds:.2f}" for stage, seconds in data["stages"].items() if stage != "total")
+        # Effective samples do not apply to exactly enumerated spots.
+        effective = data.get("effective_sample_size")
+        effective = "exact" if effective is None else f"{effective:.0f}"
+        lines.append(f"  {name:<8} {1000 * data['seconds']:>9.1f} {data['samples_per_second']:>11.0f} "
+                     f"{data['evaluations_per_second']:>11.0f} {effective:>8}  {stages}")
+        lines.append(f"  {'':<8} counters: {data['counters']}")
+    return "\n".join(lines)
+
+def regressions(report, baseline, tolerance):
+    # Anything more than tolerance slower than the baseline run.
+    found = []
+    timings = [(f"micro.{name}", data["seconds_per_call"], baseline["micro"].get(name, {}).get("seconds_per_call"))
+               for name, data in report["micro"].items()]
+    timings += [(f"spots.{name}", data["seconds"], baseline["spots"].get(name, {}).get("seconds"))
+                for name, data in report["spots"].items()]
+    for name, seconds, base in timings:
+        if base and seconds > base * (1 + tolerance):
+            found.append(f"{name}: {1000 * seconds:.3f} ms vs {1000 * base:.3f} ms baseline")
+    return found
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulation pipeline on fixed spots.")
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--engine", choices=("treys", "numpy"), default="treys")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--sampler", choices=("plain", "stratified"), default="plain")
+    parser.add_argument("--scale", type=int, default=1, help="multiplies the micro-benchmark call counts")
+    parser.add_argument("--save", help="write the report as JSON")
+    parser.add_argument("--compare", help="baseline JSON from --save; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs --compare (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.iterations, args.engine, args.workers, args.scale, args.sampler)
+    print(format_report(report))
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            found = regressions(report, json.load(f), args.tolerance)
+        print("\nregressions:" if found else "\nno regressions", *found, sep="\n  ")
+        return 1 if found else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
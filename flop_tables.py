@@ -0,0 +1,185 @@
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from functools import lru_cache
+import numpy as np
+from treys import Card
+from batch_equity import (CARD_IN_COMBO, CARD_INDEX, COMBO_CARDS, COMBO_IDS, board_runouts, range_equity_sums,
+                          range_vector)
+from poker_ev_app import FLOP_TABLE_DIR, STANDARD_DECK, simulate_win_counts
+from range_library import default_range_library
+from result_cache import range_hash
+
+# Precomputed flop equities: for one opponent range, the exact equity of
+# every hero combo on every suit-isomorphic flop, as a float16 array of
+# shape (1755 flops, 1326 combos) saved with np.save. Queries map the file
+# with mmap_mode="r", so processes share the pages instead of loading copies.
+# Combos that collide with the flop are NaN. A separate "done" array marks
+# finished flops so an interrupted build picks up where it stopped.
+#
+# Cards and combos are indexed as in batch_equity.
+
+SUIT_PERMUTATIONS = list(itertools.permutations(range(4)))
+
+def relabel(cards, permutation):
+    return [card - card % 4 + permutation[card % 4] for card in cards]
+
+def canonical_flop(flop):
+    # Smallest sorted relabelling over the 24 suit permutations, and the
+    # permutation that produced it (to carry hero's cards along).
+    best = None
+    for permutation in SUIT_PERMUTATIONS:
+        key = tuple(sorted(relabel(flop, permutation)))
+        if best is None or key < best[0]:
+            best = (key, permutation)
+    return best
+
+@lru_cache(maxsize=None)
+def canonical_flops():
+    flops = sorted(set(canonical_flop(flop)[0] for flop in itertools.combinations(range(52), 3)))
+    return flops, {flop: i for i, flop in enumerate(flops)}
+
+def flop_equities(flop, weights):
+    # Exact equity of every combo against the weighted range on one flop:
+    # every turn/river runout, every opponent combo, with card removal.
+    won, total = range_equity_sums(flop, weights, board_runouts(flop))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        equities = won / total
+    equities[CARD_IN_COMBO[list(flop)].any(axis=0) | (total <= 0)] = np.nan
+    return equities
+
+def table_paths(opponent_range_str, directory=FLOP_TABLE_DIR):
+    base = os.path.join(directory, range_hash(opponent_range_str))
+    return base + ".npy", base + ".done.npy"
+
+def build_flop_table(opponent_range_str, directory=FLOP_TABLE_DIR, limit=None, progress=None):
+    # Resumable: flops already marked done are skipped, and every finished
+    # flop is flushed to disk before it is marked done.
+    os.makedirs(directory, exist_ok=True)
+    flops, _ = canonical_flops()
+    table_path, done_path = table_paths(opponent_range_str, directory)
+    if os.path.exists(table_path) and os.path.exists(done_path):
+        table = np.load(table_path, mmap_mode="r+")
+        done = np.load(done_path, mmap_mode="r+")
+    else:
+        table = np.lib.format.open_memmap(table_path, mode="w+", dtype=np.float16, shape=(len(flops), len(COMBO_CARDS)))
+        table[:] = np.nan
+        done = np.lib.format.open_memmap(done_path, mode="w+", dtype=np.uint8, shape=(len(flops),))
+    weights = range_vector(opponent_range_str)
+    built = 0
+    for flop_id in np.flatnonzero(done == 0):
+        if limit is not None and built >= limit:
+            break
+        table[flop_id] = flop_equities(flops[flop_id], weights).astype(np.float16)
+        table.flush()
+        done[flop_id] = 1
+        done.flush()
+        built += 1
+        if progress is not None:
+            progress(int(np.count_nonzero(done)), len(flops))
+    return int(np.count_nonzero(done)), len(flops)
+
+class FlopTable:
+    def __init__(self, table_path, done_path):
+        self.equities = np.load(table_path, mmap_mode="r")
+        self.done = np.load(done_path, mmap_mode="r")
+
+    def equity(self, hero_hand, board):
+        flop, permutation = canonical_flop([CARD_INDEX[Card.new(card)] for card in board])
+        flop_id = canonical_flops()[1][flop]
+        if not self.done[flop_id]:
+            return None
+        hero = tuple(sorted(relabel([CARD_INDEX[Card.new(card)] for card in hero_hand], permutation)))
+        equity = float(self.equities[flop_id, COMBO_IDS[hero]])
+        return None if np.isnan(equity) else equity
+
+@lru_cache(maxsize=32)
+def _load_table(table_path, done_path):
+    return FlopTable(table_path, done_path)
+
+def load_flop_table(opponent_range_str, directory=FLOP_TABLE_DIR):
+    # Checked on every call rather than cached, so a long-running process
+    # picks up a table built after its first lookup.
+    table_path, done_path = table_paths(opponent_range_str, directory)
+    if not (os.path.exists(table_path) and os.path.exists(done_path)):
+        return None
+    return _load_table(table_path, done_path)
+
+def lookup_flop_equity(hero_hand, opponent_range_str, board, directory=FLOP_TABLE_DIR):
+    # None when there is no table for the range or the flop is not built yet.
+    table = load_flop_table(opponent_range_str, directory)
+    return None if table is None else table.equity(hero_hand, board)
+
+def check_flop_table(opponent_range_str, directory=FLOP_TABLE_DIR, samples=50, iterations=4000, seed=0):
+    # Compares random built entries with a fresh simulation. An entry fails
+    # when it is further off than 4 standard errors of the simulation plus
+    # float16 rounding. Entries are drawn from the ones that hold an equity
+    # (not NaN), so the list is empty, rather than the check hanging, when
+    # nothing in the table can be checked.
+    table = load_flop_table(opponent_range_str, directory)
+    if table is None:
+        raise FileNotFoundError(f"No flop table for this range in {directory}")
+    flops, _ = canonical_flops()
+    rng = random.Random(seed)
+    built = np.flatnonzero(np.asarray(table.done))
+    rows, combo_ids = np.nonzero(~np.isnan(np.asarray(table.equities[built])))
+    deck = [Card.int_to_str(card) for card in STANDARD_DECK]
+    checked = []
+    for entry in rng.sample(range(len(rows)), len(rows)):
+        if len(checked) >= samples:
+            break
+        flop_id, combo_id = int(built[rows[entry]]), int(combo_ids[entry])
+        expected = float(table.equities[flop_id, combo_id])
+        board = [deck[card] for card in flops[flop_id]]
+        hero = [deck[card] for card in COMBO_CARDS[combo_id]]
+        wins, ties, count = simulate_win_counts(hero, opponent_range_str, board, iterations, rng)
+        if not count:
+            continue
+        simulated = (wins + 0.5 * ties) / count
+        tolerance = 4 * max(np.sqrt(simulated * (1 - simulated) / count), 0.5 / count) + 1e-3
+        checked.append((hero, board, expected, simulated, abs(expected - simulated) <= tolerance))
+    return checked
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or check precomputed flop equity tables for a range.")
+    parser.add_argument("command", choices=("build", "check"))
+    parser.add_argument("--range", dest="range_path", help="opponent range file")
+    parser.add_argument("--actions", help="action path in 6max_range.zip, e.g. BTN/2.5bb/BB/Call")
+    parser.add_argument("--position", help="opponent position for --actions")
+    parser.add_argument("--dir", default=FLOP_TABLE_DIR, help=f"table directory (default: {FLOP_TABLE_DIR})")
+    parser.add_argument("--limit", type=int, help="build at most this many flops, then stop")
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=4000)
+    args = parser.parse_args(argv)
+
+    if args.range_path:
+        with open(args.range_path, "r") as f:
+            range_str = f.read().strip()
+    elif args.actions and args.position:
+        range_str = default_range_library().range_str(args.actions, args.position)
+    else:
+        parser.error("give --range or --actions and --position")
+
+    if args.command == "build":
+        started = time.perf_counter()
+        def progress(done, total):
+            print(f"\r{done}/{total} flops, {time.perf_counter() - started:.0f}s", end="", file=sys.stderr)
+        done, total = build_flop_table(range_str, args.dir, args.limit, progress)
+        print(f"\n{table_paths(range_str, args.dir)[0]}: {done}/{total} flops built", file=sys.stderr)
+        return 0
+    checked = check_flop_table(range_str, args.dir, args.samples, args.iterations)
+    if not checked:
+        print("No entries to check: no built flop has an equity for this range", file=sys.stderr)
+        return 1
+    failures = [entry for entry in checked if not entry[4]]
+    for hero, board, expected, simulated, _ in failures:
+        print(f"{''.join(hero)} on {''.join(board)}: table {expected:.4f}, simulation {simulated:.4f}")
+    worst = max((abs(entry[2] - entry[3]) for entry in checked), default=0.0)
+    print(f"{len(checked)} entries checked, {len(failures)} outside tolerance, max difference {worst:.4f}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
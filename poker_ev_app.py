@@ -1,10 +1,23 @@
+import bisect
 import os
+import queue
 import random
 import itertools
+import math
+import sqlite3
+import threading
 import time
-import tkinter as tk
-from tkinter import filedialog, messagebox
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+try:
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk
+except ImportError:
+    # Headless installs (batch_cli) only need the engine.
+    tk = None
 from treys import Card, Evaluator
+from range_library import DEFAULT_RANGE_ZIP, RangeLibrary
+from result_cache import ResultCache
 
 def parse_opponent_range(range_str):
     items = range_str.split(',')
@@ -55,157 +68,877 @@ def hand_matches_combo(designation, card1, card2):
             return suit1 != suit2
     return False
 
-def get_random_hand_combo(designation, removed_cards):
-    available_cards = [card for card in create_standard_deck() if card not in removed_cards]
-    valid_combos = []
-    for combo in itertools.combinations(available_cards, 2):
-        if hand_matches_combo(designation, combo[0], combo[1]):
-            valid_combos.append(combo)
-    return random.choice(valid_combos) if valid_combos else None
-
 def create_standard_deck():
     ranks = "23456789TJQKA"
     suits = "shdc"
     return [Card.new(rank + suit) for rank in ranks for suit in suits]
 
-def best_response_win_rate_range(hero_hand, opponent_range_str, known_board, iterations=1000):
-    evaluator = Evaluator()
+STANDARD_DECK = create_standard_deck()
+# Each card owns one bit (rank * 4 + suit) so dead-card checks are a single AND.
+CARD_BITS = {card: 1 << i for i, card in enumerate(STANDARD_DECK)}
+
+def cards_mask(cards):
+    mask = 0
+    for card in cards:
+        mask |= CARD_BITS[card]
+    return mask
+
+# All 1326 two-card combos keyed by (rank set, suited), the same attributes
+# hand_matches_combo compares on.
+COMBOS_BY_SHAPE = {}
+for _combo in itertools.combinations(STANDARD_DECK, 2):
+    _key = (frozenset(Card.STR_RANKS[Card.get_rank_int(card)] for card in _combo),
+            Card.get_suit_int(_combo[0]) == Card.get_suit_int(_combo[1]))
+    COMBOS_BY_SHAPE.setdefault(_key, []).append(_combo)
+
+@lru_cache(maxsize=None)
+def designation_combos(designation):
+    des = designation.strip().upper()
+    if len(des) == 2:
+        ranks = frozenset(des)
+        return tuple(COMBOS_BY_SHAPE.get((ranks, False), []) + COMBOS_BY_SHAPE.get((ranks, True), []))
+    if len(des) == 3 and des[2] in "SO":
+        return tuple(COMBOS_BY_SHAPE.get((frozenset(des[:2]), des[2] == "S"), []))
+    return ()
+
+def get_random_hand_combo(designation, removed_cards):
+    valid_combos = [combo for combo in designation_combos(designation)
+                    if combo[0] not in removed_cards and combo[1] not in removed_cards]
+    return random.choice(valid_combos) if valid_combos else None
+
+# Flat table of every concrete combo in a range. A designation's weight from
+# parse_opponent_range is spread evenly over the combos it expands to, so with
+# no dead cards the table draws designations exactly like the per-designation
+# sampler did; dead cards then remove individual combos (card removal).
+class CompiledRange:
+    def __init__(self, range_str):
+        combos = {}
+        for designation, weight in parse_opponent_range(range_str):
+            expanded = designation_combos(designation)
+            if not expanded or weight <= 0:
+                continue
+            combo_weight = weight / len(expanded)
+            for combo in expanded:
+                combos[combo] = combos.get(combo, 0.0) + combo_weight
+        self.combos = list(combos)
+        self.weights = [combos[combo] for combo in self.combos]
+        self.masks = [CARD_BITS[c1] | CARD_BITS[c2] for c1, c2 in self.combos]
+        self._unblocked = {}
+
+    def __len__(self):
+        return len(self.combos)
+
+    def unblocked(self, dead_mask):
+        # Cached per dead-card mask: every sample in a simulation shares the
+        # same hero/board cards, so filtering happens once, not per draw.
+        table = self._unblocked.get(dead_mask)
+        if table is None:
+            combos = []
+            cum_weights = []
+            total = 0.0
+            for combo, weight, mask in zip(self.combos, self.weights, self.masks):
+                if mask & dead_mask:
+                    continue
+                total += weight
+                combos.append(combo)
+                cum_weights.append(total)
+            table = (combos, cum_weights)
+            if len(self._unblocked) >= 64:
+                self._unblocked.clear()
+            self._unblocked[dead_mask] = table
+        return table
+
+    def weighted_combos(self, dead_mask):
+        return [(combo, weight) for combo, weight, mask in zip(self.combos, self.weights, self.masks)
+                if not mask & dead_mask]
+
+    def sample(self, dead_cards, k, rng=random):
+        combos, cum_weights = self.unblocked(cards_mask(dead_cards))
+        if not combos:
+            return []
+        return rng.choices(combos, cum_weights=cum_weights, k=k)
+
+    def systematic_sample(self, dead_cards, k, rng=random):
+        # k evenly spaced points over the cumulative weights with one random
+        # offset: every combo is drawn floor or ceil of k times its share of
+        # the weight instead of a binomial number of times. Draws come back in
+        # range order.
+        combos, cum_weights = self.unblocked(cards_mask(dead_cards))
+        if not combos or k <= 0:
+            return []
+        offset = rng.random()
+        last = len(combos) - 1
+        return [combos[min(bisect.bisect_right(cum_weights, (i + offset) * cum_weights[-1] / k), last)]
+                for i in range(k)]
+
+@lru_cache(maxsize=128)
+def compile_opponent_range(range_str):
+    return CompiledRange(range_str)
+
+@lru_cache(maxsize=None)
+def shared_evaluator():
+    # Building an Evaluator rebuilds treys' lookup tables, so build it once.
+    return Evaluator()
+
+def enumeration_size(hero_cards, opponent_range_str, board_cards):
+    # Opponent combos x runouts left once the opponent's cards are out too.
+    removed = set(hero_cards + board_cards)
+    combos = len(compile_opponent_range(opponent_range_str).unblocked(cards_mask(removed))[0])
+    return combos * math.comb(52 - len(removed) - 2, 5 - len(board_cards))
+
+# Raised inside long computations once their cancel_event is set.
+class Cancelled(Exception):
+    pass
+
+# [(combo, weight, equity)] for every unblocked opponent combo, each against
+# every runout it leaves. cancel_event (a threading.Event) is checked per
+# opponent combo, so a cancelled enumeration stops within milliseconds.
+def exact_combo_equities(hero_hand, opponent_range_str, known_board, profile=None, cancel_event=None):
+    start = time.perf_counter()
+    evaluator = shared_evaluator()
+    hero_cards = [Card.new(card) for card in hero_hand]
+    board_cards = [Card.new(card) for card in known_board]
+    removed = set(hero_cards + board_cards)
+    deck = [card for card in STANDARD_DECK if card not in removed]
+    # Hero's hand does not depend on the opponent's combo, so rank every
+    # runout for hero once and reuse it across combos.
+    runouts = []
+    for runout in itertools.combinations(deck, 5 - len(board_cards)):
+        simulated_board = board_cards + list(runout)
+        runouts.append((cards_mask(runout), simulated_board, evaluator.evaluate(hero_cards, simulated_board)))
+    combo_equities = []
+    evaluations = len(runouts)
+    for opp_combo, weight in compile_opponent_range(opponent_range_str).weighted_combos(cards_mask(removed)):
+        if cancel_event is not None and cancel_event.is_set():
+            raise Cancelled()
+        opp_mask = cards_mask(opp_combo)
+        opp_hand = list(opp_combo)
+        combo_win = 0.0
+        combo_count = 0
+        for runout_mask, simulated_board, hero_rank in runouts:
+            if runout_mask & opp_mask:
+                continue
+            opp_rank = evaluator.evaluate(opp_hand, simulated_board)
+            if hero_rank < opp_rank:
+                combo_win += 1
+            elif hero_rank == opp_rank:
+                combo_win += 0.5
+            combo_count += 1
+        if combo_count:
+            combo_equities.append((opp_combo, weight, combo_win / combo_count))
+        evaluations += combo_count
+    if profile is not None:
+        profile.add_time("exact_enumeration", time.perf_counter() - start)
+        profile.count("hand_evaluations", evaluations)
+    return combo_equities
+
+def weighted_equity(combo_equities):
+    total_weight = sum(weight for _, weight, _ in combo_equities)
+    if total_weight == 0:
+        return 0
+    return sum(weight * equity for _, weight, equity in combo_equities) / total_weight
+
+def exact_win_rate_range(hero_hand, opponent_range_str, known_board, profile=None):
+    return weighted_equity(exact_combo_equities(hero_hand, opponent_range_str, known_board, profile))
+
+def stratified_positions(n, rng=random):
+    # One point in each of n equal slices of [0, 1), in random order.
+    order = list(range(n))
+    rng.shuffle(order)
+    offset = rng.random()
+    return [(slot + offset) / n for slot in order]
+
+def stratified_runout(deck, opp_combo, positions):
+    # Each card sits at its position in [0, 1) along what is left of the live
+    # deck (rank order), so uniform positions give a uniform runout.
+    live = [card for card in deck if card not in opp_combo]
+    return [live.pop(min(int(position * len(live)), len(live) - 1)) for position in positions]
+
+# {combo: [wins, ties, count]}: hero's results against each opponent combo
+# over iterations draws of (combo by range weight, runout).
+# sampler="stratified" draws a Latin hypercube instead of independent draws:
+# combos by systematic_sample, and each runout card from its own evenly
+# spaced slices of the remaining deck, shuffled independently per card.
+# Every draw is still uniform, so estimates stay unbiased, but the mix of
+# combos and of cards at each runout position no longer varies from run to
+# run.
+def simulate_combo_outcomes(hero_hand, opponent_range_str, known_board, iterations, rng=random, sampler="plain"):
+    evaluator = shared_evaluator()
     hero_cards = [Card.new(card) for card in hero_hand]
     board_cards = [Card.new(card) for card in known_board]
     num_to_deal = 5 - len(board_cards)
-    opp_distribution = parse_opponent_range(opponent_range_str)
-    designations = [d for d, w in opp_distribution]
-    weights = [w for d, w in opp_distribution]
-    simulation_win = 0.0
-    simulation_count = 0
-    for _ in range(iterations):
-        removed = set(hero_cards + board_cards)
-        designation = random.choices(designations, weights=weights, k=1)[0]
-        opp_combo = get_random_hand_combo(designation, removed)
-        if opp_combo is None:
-            continue
-        removed_extended = removed.union(set(opp_combo))
-        deck_remaining = [card for card in create_standard_deck() if card not in removed_extended]
+    removed = set(hero_cards + board_cards)
+    if sampler == "stratified":
+        opp_combos = compile_opponent_range(opponent_range_str).systematic_sample(removed, iterations, rng)
+        positions = list(zip(*[stratified_positions(len(opp_combos), rng) for _ in range(num_to_deal)]))
+    elif sampler == "plain":
+        opp_combos = compile_opponent_range(opponent_range_str).sample(removed, iterations, rng)
+    else:
+        raise ValueError(f"Unknown sampler: {sampler}")
+    deck = [card for card in STANDARD_DECK if card not in removed]
+    outcomes = {}
+    for index, opp_combo in enumerate(opp_combos):
         if num_to_deal > 0:
-            if len(deck_remaining) < num_to_deal:
+            if len(deck) - 2 < num_to_deal:
                 continue
-            simulated_board = board_cards.copy()
-            simulated_board.extend(random.sample(deck_remaining, num_to_deal))
+            if sampler == "stratified":
+                runout = stratified_runout(deck, opp_combo, positions[index])
+            else:
+                # Oversample by the two opponent cards and drop them, which is
+                # a uniform draw from the deck minus the opponent's combo.
+                runout = [card for card in rng.sample(deck, num_to_deal + 2) if card not in opp_combo]
+            simulated_board = board_cards + runout[:num_to_deal]
         else:
-            simulated_board = board_cards.copy()
+            simulated_board = board_cards
         hero_rank = evaluator.evaluate(hero_cards, simulated_board)
         opp_rank = evaluator.evaluate(list(opp_combo), simulated_board)
+        outcome = outcomes.get(opp_combo)
+        if outcome is None:
+            outcome = outcomes[opp_combo] = [0, 0, 0]
         if hero_rank < opp_rank:
-            simulation_win += 1
+            outcome[0] += 1
         elif hero_rank == opp_rank:
-            simulation_win += 0.5
-        simulation_count += 1
-    if simulation_count == 0:
+            outcome[1] += 1
+        outcome[2] += 1
+    return outcomes
+
+def total_outcomes(outcomes):
+    return tuple(sum(outcome[i] for outcome in outcomes.values()) for i in range(3))
+
+def simulate_win_counts(hero_hand, opponent_range_str, known_board, iterations, rng=random, sampler="plain"):
+    return total_outcomes(simulate_combo_outcomes(hero_hand, opponent_range_str, known_board, iterations, rng, sampler))
+
+def use_exact_enumeration(hero_hand, opponent_range_str, known_board, iterations):
+    hero_cards = [Card.new(card) for card in hero_hand]
+    board_cards = [Card.new(card) for card in known_board]
+    return len(board_cards) >= 3 and enumeration_size(hero_cards, opponent_range_str, board_cards) <= 2 * iterations
+
+# Precomputed flop equities built by flop_tables.py, one file per range.
+FLOP_TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "equity_tables")
+
+def flop_table_win_rate(hero_hand, opponent_range_str, board):
+    # None unless a table for this range covers this flop.
+    if len(board) != 3 or not os.path.isdir(FLOP_TABLE_DIR):
+        return None
+    # Imported lazily so numpy stays an optional dependency.
+    from flop_tables import lookup_flop_equity
+    return lookup_flop_equity(hero_hand, opponent_range_str, board)
+
+# exact="auto" reads flop spots from a precomputed flop table when one
+# exists and otherwise enumerates every combo and runout whenever that takes
+# fewer hand evaluations than sampling (in practice turn and river boards);
+# exact=True/False forces either mode. sampler is as in simulate_combo_outcomes.
+def best_response_win_rate_range(hero_hand, opponent_range_str, known_board, iterations=1000, exact="auto", rng=None,
+                                 sampler="plain"):
+    if exact == "auto":
+        table_win_rate = flop_table_win_rate(hero_hand, opponent_range_str, known_board)
+        if table_win_rate is not None:
+            return table_win_rate
+        exact = use_exact_enumeration(hero_hand, opponent_range_str, known_board, iterations)
+    if exact:
+        return exact_win_rate_range(hero_hand, opponent_range_str, known_board)
+    wins, ties, count = simulate_win_counts(hero_hand, opponent_range_str, known_board, iterations,
+                                            random if rng is None else rng, sampler)
+    if count == 0:
         return 0
-    return simulation_win / simulation_count
+    return (wins + 0.5 * ties) / count
 
-# Updated opponent fold decision with additional rules.
-# New parameter all_in_bet (default None) indicates the bet amount considered "all in".
-def opponent_fold_decision(opp_hand, board, bet_size, pot, all_in_bet=None):
-    order = "23456789TJQKA"
-    evaluator = Evaluator()
-    board_ranks = [card[0] for card in board]
-    board_is_paired = any(board_ranks.count(r) >= 2 for r in board_ranks) if board else False
-    # Full house evaluation:
-    opp_value = evaluator.evaluate([Card.new(opp_hand[0]), Card.new(opp_hand[1])],
-                                    [Card.new(card) for card in board]) if board else None
-    opp_class = evaluator.get_rank_class(opp_value) if opp_value else None
+# Everything the fold rules need from the board, computed once per board and
+# shared by every combo sampled against it.
+class BoardFeatures:
+    def __init__(self, board_cards):
+        self.cards = list(board_cards)
+        self.ranks = [Card.get_rank_int(card) for card in self.cards]
+        self.rank_set = set(self.ranks)
+        suits = [Card.get_suit_int(card) for card in self.cards]
+        self.suit_counts = {suit: suits.count(suit) for suit in set(suits)}
+        self.is_paired = len(self.rank_set) < len(self.ranks)
+        self.high_rank = max(self.ranks) if self.ranks else None
+        self.monotone_four = len(self.suit_counts) == 1 and len(self.cards) == 4
+        self._rank_classes = {}
+        self._fold_thresholds = {}
+
+    def rank_class(self, combo):
+        if not self.cards:
+            return None
+        rank_class = self._rank_classes.get(combo)
+        if rank_class is None:
+            evaluator = shared_evaluator()
+            rank_class = evaluator.get_rank_class(evaluator.evaluate(list(combo), self.cards))
+            self._rank_classes[combo] = rank_class
+        return rank_class
+
+    def fold_threshold(self, combo):
+        threshold = self._fold_thresholds.get(combo)
+        if threshold is None:
+            threshold = classify_fold_threshold(self, combo)
+            self._fold_thresholds[combo] = threshold
+        return threshold
+
+@lru_cache(maxsize=256)
+def board_features(board_cards):
+    return BoardFeatures(board_cards)
+
+# Every bet/pot ratio fold_decision compares against. Keep in sync with the
+# rules below: classify_fold_threshold only probes these points.
+FOLD_RULE_RATIOS = (0.25, 0.8, 1.5, 1.6)
+ALWAYS_FOLD = (-math.inf, False)
+NEVER_FOLD = (math.inf, False)
+
+# Integer-card version of the fold rules. Rules are applied in the same order
+# and with the same thresholds as opponent_fold_decision.
+def fold_decision(features, combo, bet_size, pot):
+    card0, card1 = combo
+    rank0 = Card.get_rank_int(card0)
+    rank1 = Card.get_rank_int(card1)
+    suit0 = Card.get_suit_int(card0)
+    opp_class = features.rank_class(combo)
     # Rule: 2 pair hands never fold if board is unpaired.
-    if not board_is_paired and opp_class == 8:
+    if not features.is_paired and opp_class == 8:
         return False
+    is_suited = suit0 == Card.get_suit_int(card1)
     # Rule: Made flushes never fold.
-    opp_suits = [opp_hand[0][1], opp_hand[1][1]]
-    if board:
-        board_suits = [card[1] for card in board]
-        if opp_suits[0] == opp_suits[1] and board_suits.count(opp_suits[0]) >= 3:
-            # If flush with an Ace, never fold.
-            if 'A' in [opp_hand[0][0], opp_hand[1][0]]:
-                return False
-            return False
-    is_pair = (opp_hand[0][0] == opp_hand[1][0])
-    pair_rank = opp_hand[0][0] if is_pair else None
-    board_high = max(board, key=lambda card: order.index(card[0]))[0] if board else None
-    is_top_pair = False
-    if board_high:
-        is_top_pair = (opp_hand[0][0] == board_high or opp_hand[1][0] == board_high)
-    is_overpair = False
-    if is_pair and board_high:
-        if order.index(pair_rank) > order.index(board_high):
-            is_overpair = True
-    is_suited = (opp_hand[0][1] == opp_hand[1][1])
-    idx0 = order.index(opp_hand[0][0])
-    idx1 = order.index(opp_hand[1][0])
-    is_connected = abs(idx0 - idx1) <= 2
+    if is_suited and features.suit_counts.get(suit0, 0) >= 3:
+        return False
+    is_pair = rank0 == rank1
+    board_high = features.high_rank
+    has_board = board_high is not None
+    is_top_pair = has_board and (rank0 == board_high or rank1 == board_high)
+    is_overpair = is_pair and has_board and rank0 > board_high
+    is_connected = abs(rank0 - rank1) <= 2
     # Rule: Suited and connected hands never fold.
     if is_suited and is_connected:
         return False
     # Rule 1: No pair and no draw => fold if bet >= 0.25*pot.
-    has_draw = is_suited and is_connected  # if both, draw is strong; already covered above.
-    if (not is_pair) and (not is_top_pair) and (not is_overpair) and (not has_draw):
+    if not is_pair and not is_top_pair and not is_overpair:
         if bet_size >= 0.25 * pot:
             return True
-    # Rule 2: Top pair or overpair do not fold to bets up to 1.5×pot; only fold if bet > 1.5×pot.
+    # Rule 2: Top pair or overpair only fold if bet > 1.5×pot.
     if is_top_pair or is_overpair:
-        if bet_size > 1.5 * pot:
-            return True
-        else:
-            return False
+        return bet_size > 1.5 * pot
     # Rule 3: Suited OR connected (but not both) fold to bets >= 1.5×pot.
-    if (is_suited or is_connected) and not (is_suited and is_connected):
-        if bet_size >= 1.5 * pot:
-            return True
-    # Rule 4: For a pocket pair, check for a set.
-    if is_pair and board_high:
-        is_set = (opp_hand[0][0] in board_ranks or opp_hand[1][0] in board_ranks)
-        if order.index(pair_rank) < order.index(board_high):
-            if not is_set:
-                if bet_size >= 0.8 * pot:
-                    return True
-            else:
-                # If they have a set, they never fold—unless the board is monotone with exactly 4 cards.
-                board_suits = [card[1] for card in board]
-                board_monotone = (len(set(board_suits)) == 1 and len(board) == 4)
-                if board_monotone:
-                    # Now, if an all_in bet is being offered (all_in_bet is provided) and bet_size is at least that, they fold.
-                    if bet_size >= 1.6 * pot:
-                        return True
-                    else:
-                        return False
-    # Rule 5: Full house or better (two pair or more) never fold unless hole cards contribute nothing.
+    if (is_suited or is_connected) and bet_size >= 1.5 * pot:
+        return True
+    # Rule 4: Underpairs fold to 0.8×pot; sets only fold on a 4-card monotone board.
+    if is_pair and has_board and rank0 < board_high:
+        if rank0 not in features.rank_set:
+            if bet_size >= 0.8 * pot:
+                return True
+        elif features.monotone_four:
+            return bet_size >= 1.6 * pot
+    # Rule 5: Two pair or better folds when the hole cards contribute nothing.
     if opp_class is not None and opp_class <= 7:
-        if (opp_hand[0][0] not in board_ranks and opp_hand[1][0] not in board_ranks):
+        if rank0 not in features.rank_set and rank1 not in features.rank_set:
             return True
     return False
 
-# Updated calculate_dynamic_fold_probability to pass along all_in_bet.
-def calculate_dynamic_fold_probability(hero_hand, opponent_range_str, board, total_bet, pot, iterations=500, all_in_bet=None):
-    fold_count = 0
-    count = 0
-    hero_cards = [Card.new(card) for card in hero_hand]
-    for _ in range(iterations):
-        removed = set(hero_cards + [Card.new(card) for card in board])
-        opp_dist = parse_opponent_range(opponent_range_str)
-        designations = [d for d, w in opp_dist]
-        weights = [w for d, w in opp_dist]
-        designation = random.choices(designations, weights=weights, k=1)[0]
-        opp_combo = get_random_hand_combo(designation, removed)
-        if opp_combo is None:
-            continue
-        opp_hand = [Card.int_to_str(card) for card in opp_combo]
-        if opponent_fold_decision(opp_hand, board, total_bet, pot, all_in_bet):
-            fold_count += 1
-        count += 1
-    return fold_count / count if count > 0 else 0
+# Between rule ratios the decision cannot change, so probing below, at and
+# between every ratio finds the single (ratio, strict) point where a combo
+# starts folding: it folds to bet_size > ratio * pot when strict, else >=.
+def classify_fold_threshold(features, combo):
+    probes = [(0.0, ALWAYS_FOLD)]
+    for i, ratio in enumerate(FOLD_RULE_RATIOS):
+        above = (ratio + FOLD_RULE_RATIOS[i + 1]) / 2 if i + 1 < len(FOLD_RULE_RATIOS) else ratio + 1
+        probes.append((ratio, (ratio, False)))
+        probes.append((above, (ratio, True)))
+    decisions = [fold_decision(features, combo, bet, 1.0) for bet, _ in probes]
+    if True not in decisions:
+        return NEVER_FOLD
+    first = decisions.index(True)
+    if not all(decisions[first:]):
+        raise ValueError("Fold rules are not monotone in bet size for this combo")
+    return probes[first][1]
+
+def folds_at(threshold, bet_size, pot):
+    ratio, strict = threshold
+    if ratio == math.inf:
+        return False
+    if ratio == -math.inf:
+        return True
+    return bet_size > ratio * pot if strict else bet_size >= ratio * pot
+
+# Fold probability as a function of bet size: sampled combos are bucketed by
+# fold threshold, so a single pass prices any number of bet sizes.
+class FoldCurve:
+    # exact=True means the weights are the range's own combo weights rather
+    # than sampled counts, so fold probabilities carry no sampling error.
+    def __init__(self, exact=False):
+        self.weights = {}
+        self.total = 0
+        self.exact = exact
+
+    def add(self, threshold, weight=1):
+        self.weights[threshold] = self.weights.get(threshold, 0) + weight
+        self.total += weight
+
+    def merge(self, other):
+        for threshold, weight in other.weights.items():
+            self.add(threshold, weight)
+        return self
+
+    def fold_probability(self, bet_size, pot):
+        if not self.total:
+            return 0
+        folded = sum(weight for threshold, weight in self.weights.items() if folds_at(threshold, bet_size, pot))
+        return folded / self.total
+
+    def standard_error(self, bet_size, pot):
+        if self.exact or not self.total:
+            return 0.0
+        fold_probability = self.fold_probability(bet_size, pot)
+        return math.sqrt(fold_probability * (1 - fold_probability) / self.total)
+
+    # (bet size, strict) per threshold: strict ones only fold to bets above it.
+    def breakpoints(self, pot):
+        return sorted({(ratio * pot, strict) for ratio, strict in self.weights if abs(ratio) != math.inf})
+
+    def to_dict(self):
+        return {"weights": [[ratio, strict, weight] for (ratio, strict), weight in self.weights.items()],
+                "total": self.total, "exact": self.exact}
+
+    @classmethod
+    def from_dict(cls, data):
+        curve = cls(data["exact"])
+        for ratio, strict, weight in data["weights"]:
+            curve.weights[(ratio, strict)] = weight
+        curve.total = data["total"]
+        return curve
+
+# New parameter all_in_bet (default None) indicates the bet amount considered "all in".
+def opponent_fold_decision(opp_hand, board, bet_size, pot, all_in_bet=None):
+    combo = (Card.new(opp_hand[0]), Card.new(opp_hand[1]))
+    features = board_features(tuple(Card.new(card) for card in board))
+    return fold_decision(features, combo, bet_size, pot)
+
+def simulate_fold_curve(hero_hand, opponent_range_str, board, iterations, rng=random, sampler="plain"):
+    board_cards = tuple(Card.new(card) for card in board)
+    features = board_features(board_cards)
+    removed = set(board_cards).union(Card.new(card) for card in hero_hand)
+    compiled = compile_opponent_range(opponent_range_str)
+    if sampler == "stratified":
+        opp_combos = compiled.systematic_sample(removed, iterations, rng)
+    else:
+        opp_combos = compiled.sample(removed, iterations, rng)
+    curve = FoldCurve()
+    for opp_combo in opp_combos:
+        curve.add(features.fold_threshold(opp_combo))
+    return curve
+
+def range_fold_curve(features, weighted_combos):
+    # Exact: every unblocked combo's range weight under its fold threshold.
+    curve = FoldCurve(exact=True)
+    for combo, weight in weighted_combos:
+        curve.add(features.fold_threshold(combo), weight)
+    return curve
+
+def calculate_dynamic_fold_probability(hero_hand, opponent_range_str, board, total_bet, pot, iterations=500, all_in_bet=None, rng=None,
+                                       sampler="plain"):
+    curve = simulate_fold_curve(hero_hand, opponent_range_str, board, iterations, random if rng is None else rng, sampler)
+    return curve.fold_probability(total_bet, pot)
+
+# win_rate is hero's equity against the combos that call, not the full range.
+# pot already holds the opponent's bet: a fold wins hero the pot, and a
+# called raise adds only what the opponent puts in beyond call_cost, so a
+# raise of nothing that is always called is worth exactly a call.
+def raise_ev(call_rate, win_rate, pot, total_commitment, call_cost):
+    EV_raise_if_called = win_rate * (pot + total_commitment - call_cost) - (1 - win_rate) * total_commitment
+    return (1 - call_rate) * pot + call_rate * EV_raise_if_called
+
+def bet_ev(call_rate, win_rate, pot, candidate):
+    EV_bet_if_called = win_rate * (pot + candidate) - (1 - win_rate) * candidate
+    return (1 - call_rate) * pot + call_rate * EV_bet_if_called
 
-def evaluate_actions(hero_hand, opponent_range_str, board, pot, opp_bet, hero_stack, opp_stack, iterations=1000):
+def price_bet_size(estimate, pot, call_cost, bet_amount):
+    # call_cost > 0 prices a raise of bet_amount over a call, otherwise a bet.
+    total = call_cost + bet_amount
+    fold_probability = estimate.fold_curve.fold_probability(total, pot)
+    call_rate = 1 - fold_probability
+    win_rate = estimate.called_win_rate(total, pot)
+    if call_cost > 0:
+        EV = raise_ev(call_rate, win_rate, pot, total, call_cost)
+    else:
+        EV = bet_ev(call_rate, win_rate, pot, bet_amount)
+    return {"bet_amount": bet_amount, "fold_probability": fold_probability, "win_rate_when_called": win_rate, "EV": EV}
+
+def sizing_grid(estimate, pot, call_cost, min_amount, max_amount, points=20):
+    if points <= 1 or max_amount <= min_amount:
+        return [price_bet_size(estimate, pot, call_cost, max_amount)]
+    step = (max_amount - min_amount) / (points - 1)
+    return [price_bet_size(estimate, pot, call_cost, min_amount + i * step) for i in range(points)]
+
+SIZE_STEP = 0.01
+
+def best_bet_size(estimate, pot, call_cost, min_amount, max_amount):
+    # The fold rate and the calling range only change at threshold bets, and
+    # EV is linear in the bet between them, so the best size is at an end of
+    # the range or at either side of a threshold: the threshold itself and one
+    # step past it on the side it does not include (under it, or over it for
+    # a strict threshold).
+    amounts = {min_amount, max_amount}
+    for breakpoint, strict in estimate.fold_curve.breakpoints(pot):
+        beyond = SIZE_STEP if strict else -SIZE_STEP
+        for amount in (breakpoint - call_cost, breakpoint - call_cost + beyond):
+            if min_amount <= amount <= max_amount:
+                amounts.add(amount)
+    return max((price_bet_size(estimate, pot, call_cost, amount) for amount in sorted(amounts)),
+               key=lambda priced: priced["EV"])
+
+def engine_combo_outcomes(engine, hero_hand, opponent_range_str, board, iterations, rng=random, sampler="plain"):
+    if engine == "treys":
+        return simulate_combo_outcomes(hero_hand, opponent_range_str, board, iterations, rng, sampler)
+    if engine == "numpy":
+        # Imported lazily so numpy stays an optional dependency.
+        import numpy as np
+        from batch_equity import batch_combo_outcomes
+        return batch_combo_outcomes(hero_hand, opponent_range_str, board, iterations,
+                                    np.random.default_rng(rng.getrandbits(64)), sampler)
+    raise ValueError(f"Unknown engine: {engine}")
+
+def worker_seed(seed, worker):
+    # Independent, reproducible stream per worker derived from the run seed.
+    if seed is None:
+        return None
+    return random.Random(f"{seed}:{worker}").getrandbits(64)
+
+def split_iterations(iterations, parts):
+    return [iterations // parts + (1 if i < iterations % parts else 0) for i in range(parts)]
+
+STRATIFIED_REPLICATES = 16
+
+# Per-combo outcomes for one share of a spot's samples, as a list of
+# replicates: one for the plain sampler, STRATIFIED_REPLICATES independently
+# stratified ones otherwise (their spread is what measures the variance).
+# seed=None keeps the module-level random stream, so unseeded runs draw
+# exactly as they always have. With profile=True the second item is a
+# SpotProfile of this call (built here so pool workers can send it back).
+def simulate_spot_counts(engine, hero_hand, opponent_range_str, board, iterations, seed=None, profile=False,
+                         sampler="plain"):
+    rng = random if seed is None else random.Random(seed)
+    start = time.perf_counter()
+    shares = split_iterations(iterations, STRATIFIED_REPLICATES) if sampler == "stratified" else [iterations]
+    replicates = [engine_combo_outcomes(engine, hero_hand, opponent_range_str, board, share, rng, sampler)
+                  for share in shares if share]
+    if not profile:
+        return replicates, None
+    count = sum(total_outcomes(outcomes)[2] for outcomes in replicates)
+    stats = SpotProfile()
+    stats.add_time("win_sampling", time.perf_counter() - start)
+    stats.count("combos_sampled", count)
+    stats.count("hand_evaluations", 2 * count)
+    return replicates, stats
+
+# Opt-in per-stage timings (seconds) and counters for one evaluate_actions
+# call. Profiles from pool workers are merged back, so with workers > 1 the
+# sampling stages add up time spent in every worker, not wall time.
+class SpotProfile:
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+
+    def add_time(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def count(self, counter, n=1):
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def merge(self, other):
+        for stage, seconds in other.stages.items():
+            self.add_time(stage, seconds)
+        for counter, n in other.counters.items():
+            self.count(counter, n)
+        return self
+
+    def to_dict(self):
+        return {"stages": dict(self.stages), "counters": dict(self.counters)}
+
+_worker_pools = {}
+
+def init_worker():
+    # Forked workers inherit the parent's random state; reseed so unseeded
+    # runs do not repeat each other's draws.
+    random.seed()
+    shared_evaluator()
+
+def worker_pool(workers):
+    # Pools stay warm between calls; each worker builds its evaluator once.
+    pool = _worker_pools.get(workers)
+    if pool is None:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+        _worker_pools[workers] = pool
+    return pool
+
+def shutdown_worker_pools():
+    for pool in _worker_pools.values():
+        pool.shutdown()
+    _worker_pools.clear()
+
+def score_standard_error(wins, ties, count):
+    if not count:
+        return 0.0
+    # Each sample scores 1, 0.5 or 0.
+    mean = (wins + 0.5 * ties) / count
+    mean_square = (wins + 0.25 * ties) / count
+    return math.sqrt(max(mean_square - mean ** 2, 0.0) / count)
+
+SPOT_ESTIMATE_VERSION = 4
+
+# Hero's equity against every opponent combo, summed per fold threshold:
+# called_counts[threshold] holds sampled [wins, ties, count] and
+# called_equity[threshold] holds enumerated [weight, weight * equity].
+# fold_curve holds the range weight per threshold, so the fold probability
+# and the equity against the calling range at any bet are sums over the same
+# buckets. Estimates from separate batches or workers merge exactly;
+# exact_win_rate is set when the overall win rate was enumerated rather
+# than sampled. Stratified samples also keep their
+# per-threshold counts per replicate, since binomial errors do not apply.
+class SpotEstimate:
+    def __init__(self, exact_win_rate=None, fold_curve=None):
+        self.wins = 0
+        self.ties = 0
+        self.count = 0
+        self.exact_win_rate = exact_win_rate
+        self.fold_curve = FoldCurve() if fold_curve is None else fold_curve
+        self.called_counts = {}
+        self.called_equity = {}
+        self.replicates = []
+
+    def add_outcomes(self, threshold, wins, ties, count):
+        counts = self.called_counts.setdefault(threshold, [0, 0, 0])
+        counts[0] += wins
+        counts[1] += ties
+        counts[2] += count
+        self.wins += wins
+        self.ties += ties
+        self.count += count
+
+    def add_replicate(self, counts):
+        # counts: {threshold: [wins, ties, count]} of one stratified replicate.
+        self.replicates.append({threshold: list(outcome) for threshold, outcome in counts.items()})
+        for threshold, outcome in counts.items():
+            self.add_outcomes(threshold, *outcome)
+
+    def add_exact_equity(self, threshold, weight, weighted_equity):
+        equity = self.called_equity.setdefault(threshold, [0.0, 0.0])
+        equity[0] += weight
+        equity[1] += weighted_equity
+
+    def merge(self, other):
+        for threshold, counts in other.called_counts.items():
+            self.add_outcomes(threshold, *counts)
+        for threshold, equity in other.called_equity.items():
+            self.add_exact_equity(threshold, *equity)
+        self.replicates.extend({threshold: list(outcome) for threshold, outcome in replicate.items()}
+                               for replicate in other.replicates)
+        # Every batch of one spot carries the same exact fold curve.
+        if not self.fold_curve.total:
+            self.fold_curve = other.fold_curve
+        if self.exact_win_rate is None:
+            self.exact_win_rate = other.exact_win_rate
+        return self
+
+    @property
+    def win_rate(self):
+        if self.exact_win_rate is not None:
+            return self.exact_win_rate
+        return (self.wins + 0.5 * self.ties) / self.count if self.count else 0
+
+    def win_rate_standard_error(self):
+        if self.exact_win_rate is not None:
+            return 0.0
+        variance = self._replicate_variance(lambda threshold: True)
+        if variance is not None:
+            return math.sqrt(variance)
+        return score_standard_error(self.wins, self.ties, self.count)
+
+    def _replicate_variance(self, include):
+        # Variance of the pooled (wins + ties / 2) / count over the thresholds
+        # include() accepts, from the spread of the replicates around it
+        # (linearised ratio estimator). None with fewer than two replicates.
+        totals = []
+        for replicate in self.replicates:
+            score = count = 0
+            for threshold, outcome in replicate.items():
+                if include(threshold):
+                    score += outcome[0] + 0.5 * outcome[1]
+                    count += outcome[2]
+            totals.append((score, count))
+        count = sum(n for _, n in totals)
+        if len(totals) < 2 or not count:
+            return None
+        rate = sum(score for score, _ in totals) / count
+        spread = sum((score - rate * n) ** 2 for score, n in totals)
+        return len(totals) / (len(totals) - 1) * spread / count ** 2
+
+    def critical_value(self):
+        # Replicate-based standard errors rest on len(replicates) - 1 degrees
+        # of freedom, so their intervals use t rather than the normal Z_95.
+        if self.exact_win_rate is None and len(self.replicates) >= 2:
+            return t_95(len(self.replicates) - 1)
+        return Z_95
+
+    def effective_sample_size(self):
+        # Independent draws that would give the measured variance: the
+        # per-draw score variance over the win rate's variance. Equal to
+        # count for the plain sampler.
+        variance = self.win_rate_standard_error() ** 2
+        if not self.count or not variance:
+            return float(self.count)
+        mean = (self.wins + 0.5 * self.ties) / self.count
+        mean_square = (self.wins + 0.25 * self.ties) / self.count
+        return max(mean_square - mean ** 2, 0.0) / variance
+
+    def _calling_counts(self, bet_size, pot):
+        wins = ties = count = 0
+        for threshold, counts in self.called_counts.items():
+            if not folds_at(threshold, bet_size, pot):
+                wins += counts[0]
+                ties += counts[1]
+                count += counts[2]
+        return wins, ties, count
+
+    def called_win_rate(self, bet_size, pot):
+        # Equity against the combos that continue at this bet; with nobody
+        # folding (or everybody) that is just the overall win rate.
+        if self.fold_curve.fold_probability(bet_size, pot) in (0, 1):
+            return self.win_rate
+        if self.called_equity:
+            calling = [equity for threshold, equity in self.called_equity.items() if not folds_at(threshold, bet_size, pot)]
+            weight = sum(equity[0] for equity in calling)
+            return sum(equity[1] for equity in calling) / weight if weight else self.win_rate
+        wins, ties, count = self._calling_counts(bet_size, pot)
+        return (wins + 0.5 * ties) / count if count else self.win_rate
+
+    def called_win_rate_standard_error(self, bet_size, pot):
+        if self.fold_curve.fold_probability(bet_size, pot) in (0, 1):
+            return self.win_rate_standard_error()
+        if self.called_equity:
+            return 0.0
+        variance = self._replicate_variance(lambda threshold: not folds_at(threshold, bet_size, pot))
+        if variance is not None:
+            return math.sqrt(variance)
+        return score_standard_error(*self._calling_counts(bet_size, pot))
+
+    def to_dict(self):
+        return {"exact_win_rate": self.exact_win_rate, "fold_curve": self.fold_curve.to_dict(),
+                "called_counts": [[ratio, strict, *counts] for (ratio, strict), counts in self.called_counts.items()],
+                "called_equity": [[ratio, strict, *equity] for (ratio, strict), equity in self.called_equity.items()],
+                "replicates": [[[ratio, strict, *outcome] for (ratio, strict), outcome in replicate.items()]
+                               for replicate in self.replicates]}
+
+    @classmethod
+    def from_dict(cls, data):
+        estimate = cls(data["exact_win_rate"], FoldCurve.from_dict(data["fold_curve"]))
+        for ratio, strict, *counts in data["called_counts"]:
+            estimate.add_outcomes((ratio, strict), *counts)
+        for ratio, strict, *equity in data["called_equity"]:
+            estimate.add_exact_equity((ratio, strict), *equity)
+        for replicate in data["replicates"]:
+            estimate.replicates.append({(ratio, strict): outcome for ratio, strict, *outcome in replicate})
+        return estimate
+
+# Flop tables are not read here: they hold each combo's equity against the
+# whole range, and pricing needs it per fold threshold (the calling range).
+def simulate_spot(engine, hero_hand, opponent_range_str, board, iterations,
+                  workers=None, seed=None, exact="auto", profile=None, sampler="plain", cancel_event=None):
+    start = time.perf_counter()
+    compiled = compile_opponent_range(opponent_range_str)
+    dead_mask = cards_mask([Card.new(card) for card in hero_hand + board])
+    if profile is not None:
+        profile.add_time("compile_range", time.perf_counter() - start)
+        # Facts about the spot rather than per-batch work, so set, not added.
+        profile.counters["range_combos"] = len(compiled)
+        profile.counters["combos_blocked"] = len(compiled) - len(compiled.unblocked(dead_mask)[0])
+    if exact == "auto":
+        exact = engine == "treys" and use_exact_enumeration(hero_hand, opponent_range_str, board, iterations)
+    sample_iterations = 0 if exact else iterations
+    if not sample_iterations:
+        results = []
+    elif not workers or workers <= 1:
+        results = [simulate_spot_counts(engine, hero_hand, opponent_range_str, board,
+                                        sample_iterations, seed, profile is not None, sampler)]
+    else:
+        futures = [worker_pool(workers).submit(simulate_spot_counts, engine, hero_hand, opponent_range_str, board,
+                                               share, worker_seed(seed, worker), profile is not None, sampler)
+                   for worker, share in enumerate(split_iterations(sample_iterations, workers))]
+        results = [future.result() for future in futures]
+    combo_equities = exact_combo_equities(hero_hand, opponent_range_str, board, profile, cancel_event) if exact else []
+    features = board_features(tuple(Card.new(card) for card in board))
+    classified = len(features._fold_thresholds)
+    start = time.perf_counter()
+    fold_curve = range_fold_curve(features, compiled.weighted_combos(dead_mask))
+    estimate = SpotEstimate(weighted_equity(combo_equities) if exact else None, fold_curve)
+    for combo, weight, equity in combo_equities:
+        estimate.add_exact_equity(features.fold_threshold(combo), weight, weight * equity)
+    for replicates, stats in results:
+        for outcomes in replicates:
+            if sampler == "stratified":
+                counts = {}
+                for combo, outcome in outcomes.items():
+                    total = counts.setdefault(features.fold_threshold(combo), [0, 0, 0])
+                    for i in range(3):
+                        total[i] += outcome[i]
+                estimate.add_replicate(counts)
+            else:
+                for combo, outcome in outcomes.items():
+                    estimate.add_outcomes(features.fold_threshold(combo), *outcome)
+        if stats is not None:
+            profile.merge(stats)
+    if profile is not None:
+        profile.add_time("fold_thresholds", time.perf_counter() - start)
+        # Fold rules run once per combo and board; repeats are cache lookups.
+        profile.count("fold_rule_evaluations", len(features._fold_thresholds) - classified)
+    return estimate
+
+Z_95 = 1.96
+
+# Two-sided 95% quantile of Student's t, from the Cornish-Fisher expansion
+# around Z_95 (within 0.001 from 3 degrees of freedom up).
+def t_95(degrees_of_freedom):
+    z, n = Z_95, degrees_of_freedom
+    return (z + (z ** 3 + z) / (4 * n) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * n ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * n ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * n ** 4))
+
+def confidence_interval(value, standard_error, critical_value=Z_95):
+    return (value - critical_value * standard_error, value + critical_value * standard_error)
+
+def ev_interval(ev_function, rate, rate_standard_error, critical_value=Z_95):
+    # Delta method: the EV's error is its slope in the estimated rate times
+    # the rate's standard error.
+    step = 1e-6
+    slope = (ev_function(rate + step) - ev_function(rate - step)) / (2 * step)
+    return confidence_interval(ev_function(rate), abs(slope) * rate_standard_error, critical_value)
+
+def price_option(estimate, pot, total_bet, bet_amount, ev_function):
+    # ev_function(call_rate, win_rate_when_called). Fold probabilities come
+    # from exact range weights, so only the calling-range equity is uncertain.
+    fold_curve = estimate.fold_curve
+    fold_probability = fold_curve.fold_probability(total_bet, pot)
+    call_rate = 1 - fold_probability
+    win_rate = estimate.called_win_rate(total_bet, pot)
+    fold_se = fold_curve.standard_error(total_bet, pot)
+    win_rate_se = estimate.called_win_rate_standard_error(total_bet, pot)
+    critical_value = estimate.critical_value()
+    EV = ev_function(call_rate, win_rate)
+    fold_half_width = ev_interval(lambda rate: ev_function(rate, win_rate), call_rate, fold_se)
+    win_half_width = ev_interval(lambda rate: ev_function(call_rate, rate), win_rate, win_rate_se, critical_value)
+    half_width = math.hypot((fold_half_width[1] - fold_half_width[0]) / 2, (win_half_width[1] - win_half_width[0]) / 2)
+    return {
+        "bet_amount": bet_amount,
+        "EV": EV,
+        "EV_ci": (EV - half_width, EV + half_width),
+        "fold_probability": fold_probability,
+        "fold_probability_ci": confidence_interval(fold_probability, fold_se),
+        "win_rate_when_called": win_rate,
+        "win_rate_when_called_ci": confidence_interval(win_rate, win_rate_se, critical_value)
+    }
+
+def spot_actions(estimate, pot, opp_bet, hero_stack, opp_stack, sizing_points=0):
+    win_rate = estimate.win_rate
+    win_rate_se = estimate.win_rate_standard_error()
+    critical_value = estimate.critical_value()
     if opp_bet > 0:
         call_cost = opp_bet
-        win_rate = best_response_win_rate_range(hero_hand, opponent_range_str, board, iterations)
         EV_fold = 0
         EV_call = win_rate * pot - (1 - win_rate) * call_cost
         candidate_options = {
@@ -219,12 +952,8 @@ def evaluate_actions(hero_hand, opponent_range_str, board, pot, opp_bet, hero_st
         bet_options = {}
         for option, candidate in candidate_options.items():
             total_commitment = call_cost + candidate
-            # For the "all_in" candidate, pass candidate as all_in_bet; otherwise, None.
-            current_all_in = candidate if option == "all_in" else None
-            call_rate = 1 - calculate_dynamic_fold_probability(hero_hand, opponent_range_str, board, total_commitment, pot, iterations=500, all_in_bet=current_all_in)
-            EV_raise_if_called = call_rate * (pot + total_commitment) - (1 - call_rate) * total_commitment
-            EV_raise = (1 - call_rate) * (pot - total_commitment) + call_rate * EV_raise_if_called
-            bet_options[option] = {"bet_amount": candidate, "EV": EV_raise}
+            bet_options[option] = price_option(estimate, pot, total_commitment, candidate,
+                                               lambda call_rate, rate, total=total_commitment: raise_ev(call_rate, rate, pot, total, call_cost))
         best_bet = None
         if bet_options:
             best_bet_option = max(bet_options, key=lambda k: bet_options[k]["EV"])
@@ -238,17 +967,18 @@ def evaluate_actions(hero_hand, opponent_range_str, board, pot, opp_bet, hero_st
         if best_bet is not None and best_bet["EV"] > best_overall_EV:
             best_overall = f"bet ({best_bet['option']})"
             best_overall_EV = best_bet["EV"]
-        return {
+        results = {
             "win_rate": win_rate,
             "fold": EV_fold,
             "call": EV_call,
+            "call_ci": ev_interval(lambda rate: rate * pot - (1 - rate) * call_cost, win_rate, win_rate_se, critical_value),
             "bet_options": bet_options,
             "best_bet": best_bet,
             "best_overall": best_overall,
             "best_overall_EV": best_overall_EV
         }
     else:
-        win_rate = best_response_win_rate_range(hero_hand, opponent_range_str, board, iterations)
+        call_cost = 0
         EV_check = win_rate * pot
         candidate_options = {
             "small": 0.25 * pot,
@@ -258,11 +988,8 @@ def evaluate_actions(hero_hand, opponent_range_str, board, pot, opp_bet, hero_st
         }
         bet_options = {}
         for option, candidate in candidate_options.items():
-            total_bet = candidate
-            current_all_in = candidate if option == "all_in" else None
-            call_rate = 1 - calculate_dynamic_fold_probability(hero_hand, opponent_range_str, board, total_bet, pot, iterations=500, all_in_bet=current_all_in)
-            EV_bet = call_rate * (pot + candidate) - (1 - call_rate) * candidate
-            bet_options[option] = {"bet_amount": candidate, "EV": EV_bet}
+            bet_options[option] = price_option(estimate, pot, candidate, candidate,
+                                               lambda call_rate, rate, candidate=candidate: bet_ev(call_rate, rate, pot, candidate))
         best_bet = None
         if bet_options:
             best_bet_option = max(bet_options, key=lambda k: bet_options[k]["EV"])
@@ -273,19 +1000,185 @@ def evaluate_actions(hero_hand, opponent_range_str, board, pot, opp_bet, hero_st
         if best_bet is not None and best_bet["EV"] > best_overall_EV:
             best_overall = f"bet ({best_bet['option']})"
             best_overall_EV = best_bet["EV"]
-        return {
+        results = {
             "win_rate": win_rate,
             "check": EV_check,
+            "check_ci": ev_interval(lambda rate: rate * pot, win_rate, win_rate_se, critical_value),
             "bet_options": bet_options,
             "best_bet": best_bet,
             "best_overall": best_overall,
             "best_overall_EV": best_overall_EV
         }
+    results["win_rate_ci"] = confidence_interval(win_rate, win_rate_se, critical_value)
+    results["iterations"] = estimate.count
+    results["exact"] = estimate.exact_win_rate is not None
+    results["win_rate_variance"] = win_rate_se ** 2
+    results["effective_sample_size"] = None if results["exact"] else estimate.effective_sample_size()
+    if sizing_points > 0:
+        amounts = [option["bet_amount"] for option in bet_options.values()]
+        results["sizing"] = sizing_grid(estimate, pot, call_cost, min(amounts), max(amounts), sizing_points)
+        results["best_size"] = best_bet_size(estimate, pot, call_cost, min(amounts), max(amounts))
+    return results
+
+def action_intervals(results):
+    intervals = [results["call_ci"] if "call_ci" in results else results["check_ci"]]
+    if "fold" in results:
+        intervals.append((results["fold"], results["fold"]))
+    intervals.extend(option["EV_ci"] for option in results["bet_options"].values())
+    return intervals
+
+def best_action_is_clear(results):
+    # The top two actions are separated when their EV gap exceeds the
+    # combined half-widths of their confidence intervals.
+    intervals = sorted(action_intervals(results), key=lambda ci: ci[0] + ci[1], reverse=True)
+    if len(intervals) < 2:
+        return True
+    (low1, high1), (low2, high2) = intervals[:2]
+    gap = (low1 + high1) / 2 - (low2 + high2) / 2
+    spread = math.hypot((high1 - low1) / 2, (high2 - low2) / 2)
+    # Zero spread means both EVs are already exact; more samples cannot help.
+    return gap > spread or spread == 0
+
+def estimates_within_width(results, target_width):
+    intervals = [results["win_rate_ci"]]
+    for option in results["bet_options"].values():
+        intervals.append(option["fold_probability_ci"])
+        intervals.append(option["win_rate_when_called_ci"])
+    return all(high - low <= target_width for low, high in intervals)
+
+ADAPTIVE_BATCH = 1000
+ADAPTIVE_MAX_ITERATIONS = 1000000
+
+# Yields (estimate, results) after every batch, refining one spot until
+# max_iterations samples have been drawn. Exact enumeration runs up front
+# when it is cheaper than a batch, otherwise after the first sampled batch so
+# that a first answer is always quick. Enumerated equities and exact fold
+# weights leave nothing to refine, so that is the last batch. A set
+# cancel_event stops the enumeration part way with Cancelled.
+def iterate_actions(hero_hand, opponent_range_str, board, pot, opp_bet, hero_stack, opp_stack, iterations=1000,
+                    engine="treys", workers=None, seed=None, max_iterations=ADAPTIVE_MAX_ITERATIONS, profile=None,
+                    sampler="plain", cancel_event=None):
+    exact = engine == "treys" and use_exact_enumeration(hero_hand, opponent_range_str, board, iterations)
+    exact_first = exact and use_exact_enumeration(hero_hand, opponent_range_str, board, ADAPTIVE_BATCH)
+    estimate = SpotEstimate()
+    batch = 0
+    drawn = 0
+    while drawn < max_iterations:
+        enumerate_now = exact and (exact_first or batch == 1)
+        if enumerate_now:
+            estimate = simulate_spot(engine, hero_hand, opponent_range_str, board, 0, exact=True, profile=profile,
+                                     cancel_event=cancel_event)
+        else:
+            batch_seed = None if seed is None else worker_seed(seed, f"batch{batch}")
+            estimate.merge(simulate_spot(engine, hero_hand, opponent_range_str, board, ADAPTIVE_BATCH,
+                                         workers=workers, seed=batch_seed, exact=False, profile=profile,
+                                         sampler=sampler))
+            drawn += ADAPTIVE_BATCH
+        batch += 1
+        start = time.perf_counter()
+        results = spot_actions(estimate, pot, opp_bet, hero_stack, opp_stack)
+        if profile is not None:
+            profile.add_time("actions", time.perf_counter() - start)
+            profile.count("batches")
+        yield estimate, results
+        if enumerate_now:
+            return
+
+# workers > 1 splits the simulations across a warm process pool. seed makes a
+# run reproducible: the same seed and worker count give the same result.
+# sizing_points > 0 also prices that many evenly spaced bet sizes and searches
+# for the best size, all from the same fold curve as the named options.
+# target_width / time_budget_ms switch to adaptive mode: batches are drawn
+# until every 95% interval (win rate and fold probabilities) is at most
+# target_width wide, the budget runs out, the best action is clearly ahead of
+# the runner-up, or max_iterations samples have been drawn.
+# cache (a result_cache.ResultCache) reuses the equity and fold curve of an
+# earlier fixed-iteration run of the same spot up to suit relabelling; pot,
+# bet and stacks are applied afterwards, so they are not part of the key.
+# profile=True adds results["profile"]: per-stage seconds and counters (see
+# SpotProfile) for finding where the time goes.
+# sampler="stratified" samples equities as in simulate_combo_outcomes; the
+# win rate's measured variance and effective sample size are reported as
+# results["win_rate_variance"] and results["effective_sample_size"].
+def evaluate_actions(hero_hand, opponent_range_str, board, pot, opp_bet, hero_stack, opp_stack, iterations=1000,
+                     engine="treys", workers=None, seed=None, sizing_points=0,
+                     target_width=None, time_budget_ms=None, max_iterations=ADAPTIVE_MAX_ITERATIONS, cache=None,
+                     profile=False, sampler="plain"):
+    started = time.perf_counter()
+    profile = SpotProfile() if profile else None
+    if target_width is None and time_budget_ms is None:
+        estimate = None
+        if cache is not None:
+            # Seeded runs are only interchangeable with the same seed and split.
+            key = cache.spot_key(hero_hand, board, opponent_range_str, engine=engine, iterations=iterations,
+                                 version=SPOT_ESTIMATE_VERSION, seed=seed, sampler=sampler,
+                                 workers=workers if seed is not None else None)
+            cached = cache.get(key)
+            estimate = SpotEstimate.from_dict(cached) if cached is not None else None
+            if estimate is not None and profile is not None:
+                profile.count("cache_hits")
+        if estimate is None:
+            estimate = simulate_spot(engine, hero_hand, opponent_range_str, board, iterations, workers=workers, seed=seed,
+                                     profile=profile, sampler=sampler)
+            if cache is not None:
+                cache.put(key, estimate.to_dict())
+        stop_reason = None
+    else:
+        deadline = None if time_budget_ms is None else time.perf_counter() + time_budget_ms / 1000
+        stop_reason = "max_iterations"
+        for estimate, results in iterate_actions(hero_hand, opponent_range_str, board, pot, opp_bet, hero_stack, opp_stack,
+                                                 iterations, engine, workers, seed, max_iterations, profile, sampler):
+            if target_width is not None and estimates_within_width(results, target_width):
+                stop_reason = "target_width"
+            elif best_action_is_clear(results):
+                stop_reason = "clear_best_action"
+            elif deadline is not None and time.perf_counter() >= deadline:
+                stop_reason = "time_budget"
+            else:
+                continue
+            break
+    start = time.perf_counter()
+    results = spot_actions(estimate, pot, opp_bet, hero_stack, opp_stack, sizing_points)
+    if stop_reason is not None:
+        results["stop_reason"] = stop_reason
+    if profile is not None:
+        profile.add_time("actions", time.perf_counter() - start)
+        profile.add_time("total", time.perf_counter() - started)
+        results["profile"] = profile.to_dict()
+    return results
+
+def format_interval(value, interval, digits=2):
+    half_width = (interval[1] - interval[0]) / 2
+    return f"{value:.{digits}f} ± {half_width:.{digits}f}"
+
+def format_results(results):
+    out_str = f"Estimated Win Rate: {format_interval(results['win_rate'], results['win_rate_ci'], 3)}\n"
+    if "fold" in results:
+        out_str += f"EV (Fold): {results['fold']:.2f}\n"
+        out_str += f"EV (Call): {format_interval(results['call'], results['call_ci'])}\n"
+    else:
+        out_str += f"EV (Check): {format_interval(results['check'], results['check_ci'])}\n"
+    out_str += "Bet Options:\n"
+    for option, data in results["bet_options"].items():
+        out_str += (f"  {option}: Bet Amount = {data['bet_amount']:.2f}, EV = {format_interval(data['EV'], data['EV_ci'])}, "
+                    f"Folds = {data['fold_probability']:.0%}, Win Rate if Called = {data['win_rate_when_called']:.3f}\n")
+    if results["best_bet"]:
+        best_bet = results["best_bet"]
+        out_str += f"Best Bet Option: {best_bet['option']} (Bet Amount = {best_bet['bet_amount']:.2f}, EV = {best_bet['EV']:.2f})\n"
+    out_str += f"Overall Best Action: {results['best_overall']} with EV = {results['best_overall_EV']:.2f}\n"
+    if results.get("effective_sample_size") is not None:
+        out_str += (f"Samples: {results['iterations']} (effective {results['effective_sample_size']:.0f}, "
+                    f"win rate variance {results['win_rate_variance']:.2e})\n")
+    return out_str
 
 def parse_cards(card_str):
     card_str = card_str.strip()
     return [card_str[i:i+2] for i in range(0, len(card_str), 2)]
 
+GUI_ITERATIONS = 10000
+GUI_FIRST_POLL_MS = 20
+GUI_POLL_MS = 200
+
 class PokerEVApp:
     def __init__(self, root):
         self.root = root
@@ -293,30 +1186,56 @@ class PokerEVApp:
         self.root.geometry("500x700")
         self.root.bind("<Escape>", lambda e: self.root.quit())
         self.last_enter_time = 0
+        # Spots are solved on a worker thread that posts (job, results, done)
+        # to results_queue; the Tk thread polls it. Starting a new spot or
+        # cancelling bumps self.job so stale updates are dropped.
+        self.job = 0
+        self.cancel_event = None
+        self.results_queue = queue.Queue()
+        try:
+            self.result_cache = ResultCache()
+        except (OSError, sqlite3.Error):
+            self.result_cache = None
         self.opponent_range_str = ""
         self.range_file_path = ""
-        self.select_range_file()
+        # Ranges come from the bundled 6max_range.zip when it is present, with
+        # a button to load a range file instead; without the zip a range file
+        # has to be picked up front.
+        self.range_library = RangeLibrary(DEFAULT_RANGE_ZIP) if os.path.exists(DEFAULT_RANGE_ZIP) else None
+        if self.range_library is None:
+            self.select_range_file()
         self.create_widgets()
         self.root.bind("<Return>", self.on_enter_key)
 
-    def select_range_file(self):
+    # required=False (the Load button) keeps the current range on cancel
+    # instead of exiting. Returns whether a file was loaded.
+    def select_range_file(self, required=True):
         file_path = filedialog.askopenfilename(
             title="Select Opponent Range File",
             initialdir=os.getcwd(),
             filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")]
         )
         if not file_path:
-            messagebox.showerror("Error", "No range file selected. Exiting.")
-            self.root.quit()
-        else:
-            self.range_file_path = file_path
-            with open(file_path, "r") as f:
-                self.opponent_range_str = f.read()
+            if required:
+                messagebox.showerror("Error", "No range file selected. Exiting.")
+                self.root.quit()
+            return False
+        self.range_file_path = file_path
+        with open(file_path, "r") as f:
+            self.opponent_range_str = f.read()
+        return True
+
+    def load_range_file(self):
+        if self.select_range_file(required=False):
+            self.range_label.config(text=f"Range File: {os.path.basename(self.range_file_path)}")
 
     def create_widgets(self):
+        if self.range_library is not None:
+            self.create_range_selector()
         input_frame = tk.Frame(self.root)
         input_frame.pack(pady=10)
-        tk.Label(input_frame, text=f"Range File: {os.path.basename(self.range_file_path)}").grid(row=0, column=0, columnspan=2, pady=5)
+        self.range_label = tk.Label(input_frame, text=f"Range File: {os.path.basename(self.range_file_path)}")
+        self.range_label.grid(row=0, column=0, columnspan=2, pady=5)
         tk.Label(input_frame, text="Player's Hand (e.g., AhQs):").grid(row=1, column=0, sticky="e", padx=5, pady=5)
         self.hero_hand_entry = tk.Entry(input_frame, width=20)
         self.hero_hand_entry.grid(row=1, column=1, padx=5, pady=5)
@@ -335,12 +1254,53 @@ class PokerEVApp:
         tk.Label(input_frame, text="Pot Size (in bb, e.g., 100):").grid(row=6, column=0, sticky="e", padx=5, pady=5)
         self.pot_entry = tk.Entry(input_frame, width=20)
         self.pot_entry.grid(row=6, column=1, padx=5, pady=5)
-        self.calc_button = tk.Button(self.root, text="Calculate EV", command=self.calculate_ev)
-        self.calc_button.pack(pady=10)
-        self.output_text = tk.Text(self.root, height=10, width=60)
+        button_frame = tk.Frame(self.root)
+        button_frame.pack(pady=10)
+        self.calc_button = tk.Button(button_frame, text="Calculate EV", command=self.calculate_ev)
+        self.calc_button.grid(row=0, column=0, padx=5)
+        self.cancel_button = tk.Button(button_frame, text="Cancel", command=self.cancel_calculation, state=tk.DISABLED)
+        self.cancel_button.grid(row=0, column=1, padx=5)
+        self.status_label = tk.Label(self.root, text="")
+        self.status_label.pack()
+        self.output_text = tk.Text(self.root, height=12, width=60)
         self.output_text.pack(pady=10)
         self.output_text.config(state=tk.DISABLED)
         tk.Label(self.root, text="Press Enter twice quickly to reset for another hand. Press Esc to quit.").pack(pady=5)
+        if self.range_library is not None:
+            self.on_action_selected()
+
+    def create_range_selector(self):
+        range_frame = tk.Frame(self.root)
+        range_frame.pack(pady=5)
+        tk.Label(range_frame, text="Action Sequence:").grid(row=0, column=0, sticky="e", padx=5, pady=5)
+        action_paths = self.range_library.action_paths()
+        self.action_combo = ttk.Combobox(range_frame, values=action_paths, width=45, state="readonly")
+        self.action_combo.grid(row=0, column=1, padx=5, pady=5)
+        self.action_combo.bind("<<ComboboxSelected>>", self.on_action_selected)
+        if action_paths:
+            self.action_combo.set(action_paths[0])
+        tk.Label(range_frame, text="Opponent's Range:").grid(row=1, column=0, sticky="e", padx=5, pady=5)
+        self.position_combo = ttk.Combobox(range_frame, width=10, state="readonly")
+        self.position_combo.grid(row=1, column=1, sticky="w", padx=5, pady=5)
+        self.position_combo.bind("<<ComboboxSelected>>", self.load_library_range)
+        tk.Button(range_frame, text="Load range file…", command=self.load_range_file).grid(row=1, column=2, padx=5, pady=5)
+
+    def on_action_selected(self, event=None):
+        positions = self.range_library.positions(self.action_combo.get())
+        self.position_combo.config(values=positions)
+        if positions:
+            self.position_combo.set(positions[0])
+            self.load_library_range()
+
+    def load_library_range(self, event=None):
+        actions = self.action_combo.get()
+        position = self.position_combo.get()
+        try:
+            self.opponent_range_str = self.range_library.range_str(actions, position)
+        except KeyError as error:
+            messagebox.showerror("Error", str(error))
+            return
+        self.range_label.config(text=f"Range: {position} after {actions}")
 
     def calculate_ev(self):
         hero_hand_str = self.hero_hand_entry.get().strip()
@@ -365,31 +1325,87 @@ class PokerEVApp:
             messagebox.showerror("Error", "Player's hand must be exactly 2 cards (e.g., AhQs).")
             return
         board = parse_cards(board_str) if board_str else []
-        if opp_bet > 0:
-            results = evaluate_actions(hero_hand, self.opponent_range_str, board,
-                                       pot, opp_bet, hero_stack, opp_stack, iterations=10000)
-            out_str = f"Estimated Win Rate: {results['win_rate']:.3f}\n"
-            out_str += f"EV (Fold): {results['fold']:.2f}\n"
-            out_str += f"EV (Call): {results['call']:.2f}\n"
-            out_str += "Bet Options:\n"
-            for option, data in results["bet_options"].items():
-                out_str += f"  {option}: Bet Amount = {data['bet_amount']:.2f}, EV = {data['EV']:.2f}\n"
-            if results["best_bet"]:
-                best_bet = results["best_bet"]
-                out_str += f"Best Bet Option: {best_bet['option']} (Bet Amount = {best_bet['bet_amount']:.2f}, EV = {best_bet['EV']:.2f})\n"
-            out_str += f"Overall Best Action: {results['best_overall']} with EV = {results['best_overall_EV']:.2f}\n"
+        self.start_job((hero_hand, self.opponent_range_str, board, pot, opp_bet, hero_stack, opp_stack))
+
+    def start_job(self, spot):
+        self.cancel_calculation()
+        self.job += 1
+        self.cancel_event = threading.Event()
+        threading.Thread(target=self.run_job, args=(self.job, self.cancel_event, spot), daemon=True).start()
+        self.cancel_button.config(state=tk.NORMAL)
+        self.status_label.config(text="Calculating...")
+        self.root.after(GUI_FIRST_POLL_MS, self.poll_results, self.job)
+
+    # Runs on the worker thread: must not touch any Tk widget.
+    def run_job(self, job, cancel_event, spot):
+        hero_hand, opponent_range_str, board, pot, opp_bet, hero_stack, opp_stack = spot
+        try:
+            key = None
+            if self.result_cache is not None:
+                key = self.result_cache.spot_key(hero_hand, board, opponent_range_str, mode="gui", iterations=GUI_ITERATIONS,
+                                                 version=SPOT_ESTIMATE_VERSION)
+                cached = self.result_cache.get(key)
+                if cached is not None:
+                    results = spot_actions(SpotEstimate.from_dict(cached), pot, opp_bet, hero_stack, opp_stack)
+                    self.results_queue.put((job, results, True))
+                    return
+            estimate = None
+            for estimate, results in iterate_actions(*spot, iterations=GUI_ITERATIONS, max_iterations=GUI_ITERATIONS,
+                                                     cancel_event=cancel_event):
+                if cancel_event.is_set():
+                    return
+                self.results_queue.put((job, results, False))
+            if key is not None and estimate is not None:
+                self.result_cache.put(key, estimate.to_dict())
+            self.results_queue.put((job, None, True))
+        except Cancelled:
+            return
+        except Exception as error:
+            self.results_queue.put((job, error, True))
+
+    def poll_results(self, job, shown=False):
+        if job != self.job:
+            return
+        latest = None
+        done = False
+        while True:
+            try:
+                result_job, results, finished = self.results_queue.get_nowait()
+            except queue.Empty:
+                break
+            if result_job != job:
+                continue
+            if isinstance(results, Exception):
+                self.finish_job()
+                messagebox.showerror("Error", f"Calculation failed: {results}")
+                return
+            if results is not None:
+                latest = results
+            done = done or finished
+        if latest is not None:
+            shown = True
+            self.show_output(format_results(latest))
+            state = "exact" if latest["exact"] else f"{latest['iterations']} samples"
+            self.status_label.config(text=f"{'Done' if done else 'Refining'} ({state})")
+        if done:
+            self.finish_job()
         else:
-            results = evaluate_actions(hero_hand, self.opponent_range_str, board,
-                                       pot, opp_bet, hero_stack, opp_stack, iterations=10000)
-            out_str = f"Estimated Win Rate: {results['win_rate']:.3f}\n"
-            out_str += f"EV (Check): {results['check']:.2f}\n"
-            out_str += "Bet Options:\n"
-            for option, data in results["bet_options"].items():
-                out_str += f"  {option}: Bet Amount = {data['bet_amount']:.2f}, EV = {data['EV']:.2f}\n"
-            if results["best_bet"]:
-                best_bet = results["best_bet"]
-                out_str += f"Best Bet Option: {best_bet['option']} (Bet Amount = {best_bet['bet_amount']:.2f}, EV = {best_bet['EV']:.2f})\n"
-            out_str += f"Overall Best Action: {results['best_overall']} with EV = {results['best_overall_EV']:.2f}\n"
+            # Poll quickly until the first estimate is on screen.
+            self.root.after(GUI_POLL_MS if shown else GUI_FIRST_POLL_MS, self.poll_results, job, shown)
+
+    def cancel_calculation(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_event = None
+            self.job += 1
+            self.status_label.config(text="Cancelled")
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def finish_job(self):
+        self.cancel_event = None
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def show_output(self, out_str):
         self.output_text.config(state=tk.NORMAL)
         self.output_text.delete("1.0", tk.END)
         self.output_text.insert(tk.END, out_str)
@@ -402,6 +1418,8 @@ class PokerEVApp:
         self.last_enter_time = current_time
 
     def reset_fields(self):
+        self.cancel_calculation()
+        self.status_label.config(text="")
         self.hero_hand_entry.delete(0, tk.END)
         self.board_entry.delete(0, tk.END)
         self.hero_stack_entry.delete(0, tk.END)
@@ -0,0 +1,61 @@
+import os
+import zipfile
+from functools import lru_cache
+
+DEFAULT_RANGE_ZIP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "6max_range.zip")
+RANGE_SUFFIX = "_range.txt"
+
+def normalize_actions(actions):
+    # Accepts "BTN/2.5bb/BB/Call" or ("BTN", "2.5bb", "BB", "Call").
+    if isinstance(actions, str):
+        actions = actions.split("/")
+    return tuple(action for action in actions if action)
+
+# Preflop range tree read straight from the zip. Opening only indexes the
+# member names; range files are read and compiled on first use and kept in
+# an LRU cache, so switching between ranges does not touch the zip again.
+class RangeLibrary:
+    def __init__(self, zip_path=DEFAULT_RANGE_ZIP, cache_size=256):
+        self.zip_path = zip_path
+        self.zip_file = zipfile.ZipFile(zip_path)
+        self.index = {}
+        for name in self.zip_file.namelist():
+            parts = name.split("/")
+            if not parts[-1].endswith(RANGE_SUFFIX):
+                continue
+            # Members sit under a single root folder, e.g. 6max_range/BTN/.../BB_range.txt
+            actions = tuple(parts[1:-1])
+            position = parts[-1][:-len(RANGE_SUFFIX)]
+            self.index.setdefault(actions, {})[position] = name
+        self._read_range = lru_cache(maxsize=cache_size)(self._read_range_uncached)
+
+    def __len__(self):
+        return sum(len(positions) for positions in self.index.values())
+
+    def close(self):
+        self.zip_file.close()
+
+    def action_paths(self):
+        return sorted("/".join(actions) for actions in self.index)
+
+    def positions(self, actions):
+        return sorted(self.index.get(normalize_actions(actions), {}))
+
+    def _read_range_uncached(self, actions, position):
+        try:
+            name = self.index[actions][position]
+        except KeyError:
+            raise KeyError(f"No {position} range after {'/'.join(actions)}") from None
+        return self.zip_file.read(name).decode("utf-8").strip()
+
+    def range_str(self, actions, position):
+        return self._read_range(normalize_actions(actions), position)
+
+    def compiled_range(self, actions, position):
+        # Imported here so the GUI can use the library without a circular import.
+        from poker_ev_app import compile_opponent_range
+        return compile_opponent_range(self.range_str(actions, position))
+
+@lru_cache(maxsize=None)
+def default_range_library():
+    return RangeLibrary()
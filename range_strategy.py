@@ -0,0 +1,198 @@
+import argparse
+import csv
+import math
+import sys
+import time
+import numpy as np
+from treys import Card
+from batch_equity import CARD_COMBOS, CARD_INDEX, COMBO_CARDS, COMBO_IDS, board_runouts, range_equity_sums
+from batch_cli import load_range_file
+from poker_ev_app import (FoldCurve, SpotEstimate, board_features, compile_opponent_range, parse_cards,
+                          spot_actions)
+from range_library import default_range_library
+
+# Whole-range study: every combo in hero's range against the opponent's range
+# on one board, in one batched pass. Opponent combos are grouped by the fold
+# threshold the fold rules give them, and range_equity_sums scores all 1326
+# hero combos against every group over the same runouts (all of them from
+# the flop on, a random sample preflop). Each hero combo then gets the
+# SpotEstimate a single exact evaluate_actions run would build (calling
+# equity per group, fold curve from its unblocked range weights), and the
+# usual spot_actions pricing.
+
+RANKS = "AKQJT98765432"
+DEFAULT_RUNOUTS = 2000
+
+def combo_label(c1, c2):
+    if Card.get_rank_int(c1) < Card.get_rank_int(c2):
+        c1, c2 = c2, c1
+    return Card.int_to_str(c1) + Card.int_to_str(c2)
+
+def hand_class(combo):
+    ranks, suits = combo[0] + combo[2], combo[1] + combo[3]
+    if ranks[0] == ranks[1]:
+        return ranks
+    return ranks + ("s" if suits[0] == suits[1] else "o")
+
+def combo_id(c1, c2):
+    return COMBO_IDS[tuple(sorted((CARD_INDEX[c1], CARD_INDEX[c2])))]
+
+def threshold_weights(features, opponent_range_str, board_cards):
+    # (thresholds, (1326, len(thresholds)) weights): the opponent range split
+    # by fold threshold, with combos that hit the board left out.
+    board = set(board_cards)
+    columns = {}
+    entries = []
+    compiled = compile_opponent_range(opponent_range_str)
+    for combo, weight in zip(compiled.combos, compiled.weights):
+        if combo[0] in board or combo[1] in board:
+            continue
+        threshold = features.fold_threshold(combo)
+        entries.append((combo_id(*combo), columns.setdefault(threshold, len(columns)), weight))
+    weights = np.zeros((len(COMBO_IDS), len(columns)))
+    for combo, column, weight in entries:
+        weights[combo, column] += weight
+    return list(columns), weights
+
+def action_evs(results):
+    evs = {"fold": results["fold"], "call": results["call"]} if "fold" in results else {"check": results["check"]}
+    evs.update((option, data["EV"]) for option, data in results["bet_options"].items())
+    return evs
+
+def range_strategy(hero_range_str, opponent_range_str, board, pot, opp_bet, hero_stack, opp_stack,
+                   runouts=DEFAULT_RUNOUTS, seed=None):
+    start = time.perf_counter()
+    board_cards = [Card.new(card) for card in board]
+    features = board_features(tuple(board_cards))
+    thresholds, weights = threshold_weights(features, opponent_range_str, board_cards)
+    board_ids = [CARD_INDEX[card] for card in board_cards]
+    sampled_runouts = board_runouts(board_ids, runouts, np.random.default_rng(seed))
+    won, faced = range_equity_sums(board_ids, weights, sampled_runouts)
+    # Opponent weight left per threshold once each hero combo's own cards are
+    # out: everything, minus the combos holding either card, plus the combo
+    # itself (it holds both, so it was taken out twice).
+    card_weights = weights[CARD_COMBOS].sum(axis=1)
+    unblocked = (weights.sum(axis=0)[None] - card_weights[COMBO_CARDS[:, 0]]
+                 - card_weights[COMBO_CARDS[:, 1]] + weights)
+    rows = []
+    compiled = compile_opponent_range(hero_range_str)
+    for combo, weight in zip(compiled.combos, compiled.weights):
+        if combo[0] in board_cards or combo[1] in board_cards:
+            continue
+        i = combo_id(*combo)
+        if faced[i].sum() <= 0:
+            continue
+        fold_curve = FoldCurve(exact=True)
+        estimate = SpotEstimate(won[i].sum() / faced[i].sum(), fold_curve)
+        for column, threshold in enumerate(thresholds):
+            if unblocked[i, column] > 0:
+                fold_curve.add(threshold, unblocked[i, column])
+                estimate.add_exact_equity(threshold, faced[i, column], won[i, column])
+        results = spot_actions(estimate, pot, opp_bet, hero_stack, opp_stack)
+        label = combo_label(*combo)
+        rows.append({"combo": label, "hand": hand_class(label), "weight": weight,
+                     "win_rate": results["win_rate"], **action_evs(results),
+                     "best_action": results["best_overall"], "best_EV": results["best_overall_EV"]})
+    return {"rows": rows, "runouts": len(sampled_runouts),
+            "exact": len(sampled_runouts) == math.comb(52 - len(board), 5 - len(board)),
+            "seconds": time.perf_counter() - start}
+
+def write_csv(rows, out):
+    if not rows:
+        return
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+
+def grid_cells(rows, value="best_action"):
+    # 13x13 hand grid, pairs on the diagonal, suited above it, offsuit below.
+    # A cell is the weighted average of value over its combos, or for
+    # best_action the action its combos take by the most range weight.
+    groups = {}
+    for row in rows:
+        groups.setdefault(row["hand"], []).append(row)
+    cells = []
+    for i, first in enumerate(RANKS):
+        line = []
+        for j, second in enumerate(RANKS):
+            if i == j:
+                hand = first + second
+            elif i < j:
+                hand = first + second + "s"
+            else:
+                hand = second + first + "o"
+            combos = groups.get(hand)
+            if not combos:
+                line.append("")
+            elif value == "best_action":
+                totals = {}
+                for row in combos:
+                    totals[row[value]] = totals.get(row[value], 0) + row["weight"]
+                line.append(max(totals, key=totals.get))
+            else:
+                weight = sum(row["weight"] for row in combos)
+                line.append(f"{sum(row['weight'] * row[value] for row in combos) / weight:.3f}")
+        cells.append(line)
+    return cells
+
+def format_grid(cells):
+    width = max([len(cell) for line in cells for cell in line] + [2])
+    lines = [" " * 3 + " ".join(f"{rank:>{width}}" for rank in RANKS)]
+    for rank, line in zip(RANKS, cells):
+        lines.append(f"{rank:<3}" + " ".join(f"{cell:>{width}}" for cell in line))
+    return "\n".join(lines)
+
+def load_range(path, actions, position):
+    if path:
+        return load_range_file(path)
+    return default_range_library().range_str(actions, position)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Best action and EVs for every combo in hero's range on one board.")
+    parser.add_argument("--board", default="", help="e.g. Qh7h2c")
+    parser.add_argument("--pot", type=float, required=True)
+    parser.add_argument("--bet", type=float, default=0, help="opponent's bet to hero (default: 0)")
+    parser.add_argument("--hero-stack", type=float, required=True)
+    parser.add_argument("--opp-stack", type=float, required=True)
+    parser.add_argument("--actions", help="action path in 6max_range.zip, e.g. BTN/2.5bb/BB/Call")
+    parser.add_argument("--hero", help="hero's position for --actions")
+    parser.add_argument("--opponent", help="opponent's position for --actions")
+    parser.add_argument("--hero-range", help="hero range file (instead of --actions/--hero)")
+    parser.add_argument("--opponent-range", help="opponent range file (instead of --actions/--opponent)")
+    parser.add_argument("--runouts", type=int, default=DEFAULT_RUNOUTS,
+                        help="runouts to sample when there are more than this (default: 2000)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--csv", help="write the per-combo table as CSV (- for stdout)")
+    parser.add_argument("--grid", help="write the 13x13 grid as CSV (- to print it)")
+    parser.add_argument("--grid-value", default="best_action",
+                        help="grid column: best_action (default), win_rate, best_EV or an action's EV")
+    args = parser.parse_args(argv)
+
+    if not (args.hero_range or (args.actions and args.hero)):
+        parser.error("need --hero-range or --actions with --hero")
+    if not (args.opponent_range or (args.actions and args.opponent)):
+        parser.error("need --opponent-range or --actions with --opponent")
+    hero_range_str = load_range(args.hero_range, args.actions, args.hero)
+    opponent_range_str = load_range(args.opponent_range, args.actions, args.opponent)
+    strategy = range_strategy(hero_range_str, opponent_range_str, parse_cards(args.board), args.pot, args.bet,
+                              args.hero_stack, args.opp_stack, args.runouts, args.seed)
+    rows = strategy["rows"]
+    if args.csv == "-":
+        write_csv(rows, sys.stdout)
+    elif args.csv:
+        with open(args.csv, "w", newline="") as out:
+            write_csv(rows, out)
+    cells = grid_cells(rows, args.grid_value)
+    if args.grid and args.grid != "-":
+        with open(args.grid, "w", newline="") as out:
+            writer = csv.writer(out)
+            writer.writerow([""] + list(RANKS))
+            writer.writerows([rank] + line for rank, line in zip(RANKS, cells))
+    elif args.grid == "-" or not args.csv:
+        print(format_grid(cells))
+    print(f"{len(rows)} combos, {strategy['runouts']} runouts ({'exact' if strategy['exact'] else 'sampled'}) "
+          f"in {strategy['seconds']:.2f}s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".simple_poker_solver", "results.sqlite")
+SUITS = "shdc"
+SUIT_PERMUTATIONS = [dict(zip(SUITS, permutation)) for permutation in itertools.permutations(SUITS)]
+
+def canonical_cards(hero_hand, board):
+    # Ranges and fold rules treat suits symmetrically, so spots that differ
+    # only by a relabelling of suits (AhKh on Qh7h2c vs AsKs on Qs7s2d) share
+    # a key: the smallest relabelled (hero, board) over all 24 suit orders.
+    best = None
+    for mapping in SUIT_PERMUTATIONS:
+        hero = "".join(sorted(card[0] + mapping[card[1]] for card in hero_hand))
+        board_key = "".join(sorted(card[0] + mapping[card[1]] for card in board))
+        if best is None or (hero, board_key) < best:
+            best = (hero, board_key)
+    return best
+
+def range_hash(range_str):
+    return hashlib.sha1(range_str.strip().encode("utf-8")).hexdigest()[:16]
+
+# Two-tier cache of JSON-able results: an in-memory LRU in front of a SQLite
+# file that survives restarts. The file is trimmed least-recently-used first
+# once its payloads exceed max_disk_bytes.
+class ResultCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, memory_entries=4096, max_disk_bytes=64 * 1024 * 1024):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS results "
+                                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self.connection.commit()
+        self.disk_bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def spot_key(self, hero_hand, board, opponent_range_str, **params):
+        hero, board_key = canonical_cards(hero_hand, board)
+        return json.dumps([hero, board_key, range_hash(opponent_range_str), sorted(params.items())])
+
+    def get(self, key):
+        with self.lock:
+            value = self.memory.get(key)
+            if value is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            row = self.connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+            self.disk_hits += 1
+            value = json.loads(row[0])
+            self._remember(key, value)
+            return value
+
+    def put(self, key, value):
+        payload = json.dumps(value)
+        with self.lock:
+            self._remember(key, value)
+            row = self.connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.disk_bytes -= row[0]
+            self.connection.execute("INSERT OR REPLACE INTO results (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                                    (key, payload, len(payload), time.time()))
+            self.disk_bytes += len(payload)
+            self._evict()
+            self.connection.commit()
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict(self):
+        while self.disk_bytes > self.max_disk_bytes:
+            rows = self.connection.execute("SELECT key, size FROM results ORDER BY last_used LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self.connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.memory.pop(key, None)
+                self.disk_bytes -= size
+                if self.disk_bytes <= self.max_disk_bytes:
+                    break
+
+    def stats(self):
+        with self.lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+            "disk_entries": entries,
+            "disk_bytes": self.disk_bytes
+        }
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            self.connection.execute("DELETE FROM results")
+            self.connection.commit()
+            self.disk_bytes = 0
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,172 @@
+import itertools
+import random
+import pytest
+from treys import Card, Evaluator
+from poker_ev_app import (NEVER_FOLD, SIZE_STEP, STANDARD_DECK, FoldCurve, SpotEstimate, best_bet_size,
+                          board_features, fold_decision, folds_at, opponent_fold_decision, parse_cards, raise_ev,
+                          spot_actions)
+
+# Parity of the integer fold rules with the original string-based rules.
+# reference_fold_decision is the original opponent_fold_decision, frozen
+# verbatim except that it shares one Evaluator instead of building one per
+# call (construction has no effect on the ranks it returns).
+
+REFERENCE_EVALUATOR = Evaluator()
+
+def reference_fold_decision(opp_hand, board, bet_size, pot, all_in_bet=None):
+    order = "23456789TJQKA"
+    evaluator = REFERENCE_EVALUATOR
+    board_ranks = [card[0] for card in board]
+    board_is_paired = any(board_ranks.count(r) >= 2 for r in board_ranks) if board else False
+    # Full house evaluation:
+    opp_value = evaluator.evaluate([Card.new(opp_hand[0]), Card.new(opp_hand[1])],
+                                    [Card.new(card) for card in board]) if board else None
+    opp_class = evaluator.get_rank_class(opp_value) if opp_value else None
+    # Rule: 2 pair hands never fold if board is unpaired.
+    if not board_is_paired and opp_class == 8:
+        return False
+    # Rule: Made flushes never fold.
+    opp_suits = [opp_hand[0][1], opp_hand[1][1]]
+    if board:
+        board_suits = [card[1] for card in board]
+        if opp_suits[0] == opp_suits[1] and board_suits.count(opp_suits[0]) >= 3:
+            # If flush with an Ace, never fold.
+            if 'A' in [opp_hand[0][0], opp_hand[1][0]]:
+                return False
+            return False
+    is_pair = (opp_hand[0][0] == opp_hand[1][0])
+    pair_rank = opp_hand[0][0] if is_pair else None
+    board_high = max(board, key=lambda card: order.index(card[0]))[0] if board else None
+    is_top_pair = False
+    if board_high:
+        is_top_pair = (opp_hand[0][0] == board_high or opp_hand[1][0] == board_high)
+    is_overpair = False
+    if is_pair and board_high:
+        if order.index(pair_rank) > order.index(board_high):
+            is_overpair = True
+    is_suited = (opp_hand[0][1] == opp_hand[1][1])
+    idx0 = order.index(opp_hand[0][0])
+    idx1 = order.index(opp_hand[1][0])
+    is_connected = abs(idx0 - idx1) <= 2
+    # Rule: Suited and connected hands never fold.
+    if is_suited and is_connected:
+        return False
+    # Rule 1: No pair and no draw => fold if bet >= 0.25*pot.
+    has_draw = is_suited and is_connected  # if both, draw is strong; already covered above.
+    if (not is_pair) and (not is_top_pair) and (not is_overpair) and (not has_draw):
+        if bet_size >= 0.25 * pot:
+            return True
+    # Rule 2: Top pair or overpair do not fold to bets up to 1.5×pot; only fold if bet > 1.5×pot.
+    if is_top_pair or is_overpair:
+        if bet_size > 1.5 * pot:
+            return True
+        else:
+            return False
+    # Rule 3: Suited OR connected (but not both) fold to bets >= 1.5×pot.
+    if (is_suited or is_connected) and not (is_suited and is_connected):
+        if bet_size >= 1.5 * pot:
+            return True
+    # Rule 4: For a pocket pair, check for a set.
+    if is_pair and board_high:
+        is_set = (opp_hand[0][0] in board_ranks or opp_hand[1][0] in board_ranks)
+        if order.index(pair_rank) < order.index(board_high):
+            if not is_set:
+                if bet_size >= 0.8 * pot:
+                    return True
+            else:
+                # If they have a set, they never fold—unless the board is monotone with exactly 4 cards.
+                board_suits = [card[1] for card in board]
+                board_monotone = (len(set(board_suits)) == 1 and len(board) == 4)
+                if board_monotone:
+                    # Now, if an all_in bet is being offered (all_in_bet is provided) and bet_size is at least that, they fold.
+                    if bet_size >= 1.6 * pot:
+                        return True
+                    else:
+                        return False
+    # Rule 5: Full house or better (two pair or more) never fold unless hole cards contribute nothing.
+    if opp_class is not None and opp_class <= 7:
+        if (opp_hand[0][0] not in board_ranks and opp_hand[1][0] not in board_ranks):
+            return True
+    return False
+
+BOARDS = {
+    "empty": "",
+    "rainbow": "Kd8s3c",
+    "paired": "Qh7hQc",
+    "monotone": "Jh8h3h",
+    "monotone_four": "Ks9s6s2s",
+    "trips": "7c7d7h",
+    "river": "As9d9h5c2s",
+}
+# Bet/pot ratios below, at and above every rule threshold (0.25, 0.8, 1.5, 1.6).
+RATIOS = (0.0, 0.1, 0.25, 0.3, 0.5, 0.8, 0.9, 1.2, 1.5, 1.55, 1.6, 1.7, 3.0)
+POT = 10.0
+
+def unblocked_combos(board):
+    deck = [card for card in STANDARD_DECK if Card.int_to_str(card) not in board]
+    return itertools.combinations(deck, 2)
+
+@pytest.mark.parametrize("name", sorted(BOARDS))
+def test_fold_rules_match_reference(name):
+    board = parse_cards(BOARDS[name])
+    features = board_features(tuple(Card.new(card) for card in board))
+    mismatches = []
+    for combo in unblocked_combos(board):
+        opp_hand = [Card.int_to_str(card) for card in combo]
+        threshold = features.fold_threshold(combo)
+        for ratio in RATIOS:
+            bet_size = ratio * POT
+            expected = reference_fold_decision(opp_hand, board, bet_size, POT)
+            decisions = (fold_decision(features, combo, bet_size, POT),
+                         opponent_fold_decision(opp_hand, board, bet_size, POT),
+                         folds_at(threshold, bet_size, POT))
+            if any(decision != expected for decision in decisions):
+                mismatches.append((opp_hand, ratio, expected, decisions))
+    assert not mismatches, mismatches[:10]
+
+# A raise of nothing that is always called puts hero in exactly the spot a
+# call does, so raise_ev has to price it like spot_actions prices the call.
+@pytest.mark.parametrize("win_rate", (0.0, 0.25, 0.6, 1.0))
+@pytest.mark.parametrize("pot, call_cost", ((10.0, 3.0), (13.0, 3.0), (4.0, 10.0)))
+def test_zero_raise_always_called_is_a_call(win_rate, pot, call_cost):
+    results = spot_actions(SpotEstimate(win_rate, FoldCurve(exact=True)), pot, call_cost, 100, 100)
+    assert raise_ev(1, win_rate, pot, call_cost, call_cost) == pytest.approx(results["call"])
+
+# Hero can't beat the half of the range that folds only to bets above 1.5x
+# pot (strict), so the best bet is one step past 15, not at or under it.
+def test_best_bet_size_steps_past_strict_threshold():
+    fold_curve = FoldCurve(exact=True)
+    estimate = SpotEstimate(0.2, fold_curve)
+    for threshold, equity in (((1.5, True), 0.0), (NEVER_FOLD, 0.4)):
+        fold_curve.add(threshold)
+        estimate.add_exact_equity(threshold, 1, equity)
+    best = best_bet_size(estimate, 10, 0, 2.5, 100)
+    assert best["bet_amount"] == pytest.approx(15 + SIZE_STEP)
+    assert best["fold_probability"] == 0.5
+
+def random_hands(rng, count, flush_cards=0):
+    # 7-card hands as deck indices; flush_cards > 0 deals that many (5 to 7)
+    # from one suit so the flush table is exercised, straight flushes included.
+    hands = []
+    for _ in range(count):
+        if flush_cards:
+            suit = rng.randrange(4)
+            suited = rng.sample([i for i in range(52) if i % 4 == suit], flush_cards)
+            rest = rng.sample([i for i in range(52) if i % 4 != suit], 7 - flush_cards)
+            hands.append(rng.sample(suited + rest, 7))
+        else:
+            hands.append(rng.sample(range(52), 7))
+    return hands
+
+# The batched engine's rank tables must rank every hand exactly as treys does,
+# or its win and tie counts drift from the treys engine.
+@pytest.mark.parametrize("flush_cards", (0, 5, 6, 7))
+def test_evaluate_seven_matches_treys(flush_cards):
+    np = pytest.importorskip("numpy")
+    from batch_equity import evaluate_seven
+    hands = random_hands(random.Random(flush_cards), 3000, flush_cards)
+    ranks = evaluate_seven(np.array(hands, dtype=np.int64))
+    expected = [REFERENCE_EVALUATOR.evaluate([STANDARD_DECK[card] for card in hand[5:]],
+                                             [STANDARD_DECK[card] for card in hand[:5]]) for hand in hands]
+    mismatches = [(hand, int(rank), want) for hand, rank, want in zip(hands, ranks, expected) if rank != want]
+    assert not mismatches, mismatches[:10]